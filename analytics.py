@@ -0,0 +1,178 @@
+from sqlalchemy import and_, case, func, literal
+from models import db, answer_history, dialect_insert, Attempt, Question, QuestionStats, QuestionTimeBucket, StudentStats, \
+    TopicStats, User
+
+OPTION_COLUMNS = {'A': 'option_a', 'B': 'option_b', 'C': 'option_c', 'D': 'option_d'}
+
+# Upper bounds (seconds) of the answer-time histogram; the last bucket is open-ended
+TIME_BUCKETS = (10, 20, 30, 45, 60, 90, 120, 180, 240, 300, 420, 600, 900, 1200, 1800, 2700, 3600)
+
+
+def _elapsed_seconds(start, end):
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return (func.julianday(end) - func.julianday(start)) * 86400
+    return func.extract('epoch', end - start)
+
+
+def _time_bucket(seconds):
+    return case(*[(seconds < bound, i) for i, bound in enumerate(TIME_BUCKETS)], else_=len(TIME_BUCKETS))
+
+
+def _option_column(selected_option):
+    return OPTION_COLUMNS.get((selected_option or '').upper(), 'option_other')
+
+
+# --- Incremental updates ---
+def record_submission(student_id, question_id, topic, selected_option, is_correct, submitted_at):
+    """Fold one answer into the question, topic and answer-time summaries inside the caller's transaction."""
+    correct = 1 if is_correct else 0
+    option = _option_column(selected_option)
+    values = {'question_id': question_id, 'answers': 1, 'correct': correct, 'option_other': 0}
+    values.update({column: 0 for column in OPTION_COLUMNS.values()})
+    values[option] = 1
+    db.session.execute(dialect_insert(QuestionStats).values(values).on_conflict_do_update(
+        index_elements=[QuestionStats.question_id],
+        set_={'answers': QuestionStats.answers + 1, 'correct': QuestionStats.correct + correct,
+              option: getattr(QuestionStats, option) + 1},
+    ))
+    if topic:
+        db.session.execute(dialect_insert(TopicStats).values(
+            student_id=student_id, topic=topic, solved=1, correct=correct,
+        ).on_conflict_do_update(
+            index_elements=[TopicStats.student_id, TopicStats.topic],
+            set_={'solved': TopicStats.solved + 1, 'correct': TopicStats.correct + correct},
+        ))
+    # Time from the attempt start, computed in the same statement that bumps the bucket
+    seconds = _elapsed_seconds(Attempt.start_time, literal(submitted_at, db.DateTime))
+    bucket = db.select(literal(question_id), _time_bucket(seconds), literal(1)).where(
+        Attempt.student_id == student_id, Attempt.question_id == question_id, Attempt.start_time <= submitted_at)
+    db.session.execute(dialect_insert(QuestionTimeBucket).from_select(
+        ['question_id', 'bucket', 'count'], bucket,
+    ).on_conflict_do_update(
+        index_elements=[QuestionTimeBucket.question_id, QuestionTimeBucket.bucket],
+        set_={'count': QuestionTimeBucket.count + 1},
+    ))
+
+
+# --- Full rebuilds ---
+def rebuild_topic_stats(student_ids=None):
+    """Recompute per-topic totals from the live and archived answers; all students when no ids are given."""
+    answers = answer_history()
+    delete = db.delete(TopicStats)
+    select = db.select(
+        answers.c.student_id, Question.topic, func.count(answers.c.id),
+        func.coalesce(func.sum(case((answers.c.is_correct.is_(True), 1), else_=0)), 0),
+    ).join(Question, answers.c.question_id == Question.id) \
+        .where(Question.topic.is_not(None), Question.topic != '') \
+        .group_by(answers.c.student_id, Question.topic)
+    if student_ids is not None:
+        student_ids = list(student_ids)
+        if not student_ids:
+            return 0
+        delete = delete.where(TopicStats.student_id.in_(student_ids))
+        select = select.where(answers.c.student_id.in_(student_ids))
+    db.session.execute(delete)
+    return db.session.execute(db.insert(TopicStats).from_select(
+        ['student_id', 'topic', 'solved', 'correct'], select)).rowcount
+
+
+def rebuild_question_stats(question_ids=None):
+    """Recompute per-question counts and answer-time histograms; all questions when no ids are given."""
+    answers = answer_history()
+    option = func.upper(answers.c.selected_option)
+    stats = db.select(
+        answers.c.question_id, func.count(answers.c.id),
+        func.coalesce(func.sum(case((answers.c.is_correct.is_(True), 1), else_=0)), 0),
+        *[func.coalesce(func.sum(case((option == label, 1), else_=0)), 0) for label in OPTION_COLUMNS],
+        func.coalesce(func.sum(case((option.in_(list(OPTION_COLUMNS)), 0), else_=1)), 0),
+    ).group_by(answers.c.question_id)
+    bucket = _time_bucket(_elapsed_seconds(Attempt.start_time, answers.c.submitted_at))
+    buckets = db.select(answers.c.question_id, bucket, func.count()) \
+        .join(Attempt, and_(Attempt.student_id == answers.c.student_id, Attempt.question_id == answers.c.question_id,
+                            Attempt.start_time <= answers.c.submitted_at)) \
+        .group_by(answers.c.question_id, bucket)
+    delete_stats, delete_buckets = db.delete(QuestionStats), db.delete(QuestionTimeBucket)
+    if question_ids is not None:
+        question_ids = list(question_ids)
+        if not question_ids:
+            return 0
+        stats = stats.where(answers.c.question_id.in_(question_ids))
+        buckets = buckets.where(answers.c.question_id.in_(question_ids))
+        delete_stats = delete_stats.where(QuestionStats.question_id.in_(question_ids))
+        delete_buckets = delete_buckets.where(QuestionTimeBucket.question_id.in_(question_ids))
+    db.session.execute(delete_stats)
+    db.session.execute(delete_buckets)
+    columns = ['question_id', 'answers', 'correct', *OPTION_COLUMNS.values(), 'option_other']
+    rows = db.session.execute(db.insert(QuestionStats).from_select(columns, stats)).rowcount
+    db.session.execute(db.insert(QuestionTimeBucket).from_select(['question_id', 'bucket', 'count'], buckets))
+    return rows
+
+
+def forget_question(question_id):
+    db.session.execute(db.delete(QuestionStats).where(QuestionStats.question_id == question_id))
+    db.session.execute(db.delete(QuestionTimeBucket).where(QuestionTimeBucket.question_id == question_id))
+
+
+# --- Reads ---
+def _accuracy(correct, total):
+    return (correct / total * 100) if total else 0
+
+
+def _ranking(model, limit, *criteria):
+    # Most correct answers first; fewer attempts wins a tie
+    rows = db.session.query(User.username, User.full_name, model.solved, model.correct) \
+        .join(User, User.id == model.student_id) \
+        .filter(model.solved > 0, *criteria) \
+        .order_by(model.correct.desc(), model.solved, User.username) \
+        .limit(limit).all()
+    return [{'name': r.full_name or r.username, 'username': r.username, 'solved': r.solved,
+             'correct': r.correct, 'accuracy': _accuracy(r.correct, r.solved)} for r in rows]
+
+
+def overall_leaderboard(limit=50):
+    return _ranking(StudentStats, limit)
+
+
+def topic_leaderboard(topic, limit=50):
+    return _ranking(TopicStats, limit, TopicStats.topic == topic)
+
+
+def leaderboard_topics():
+    return [topic for (topic,) in db.session.query(TopicStats.topic).distinct().order_by(TopicStats.topic)]
+
+
+def median_seconds(counts):
+    """Median from {bucket: count}, interpolated linearly inside its bucket; None without data."""
+    total = sum(counts.values())
+    if not total:
+        return None
+    half, seen = total / 2, 0
+    for bucket in range(len(TIME_BUCKETS) + 1):
+        count = counts.get(bucket, 0)
+        if count and seen + count >= half:
+            lower = TIME_BUCKETS[bucket - 1] if bucket else 0
+            if bucket == len(TIME_BUCKETS):
+                return lower
+            return lower + (TIME_BUCKETS[bucket] - lower) * (half - seen) / count
+        seen += count
+
+
+def question_analytics():
+    rows = db.session.query(Question.id, Question.text, Question.topic, Question.correct_answer, QuestionStats) \
+        .join(QuestionStats, QuestionStats.question_id == Question.id) \
+        .order_by(QuestionStats.answers.desc(), Question.id).all()
+    histograms = {}
+    for question_id, bucket, count in db.session.query(
+            QuestionTimeBucket.question_id, QuestionTimeBucket.bucket, QuestionTimeBucket.count):
+        histograms.setdefault(question_id, {})[bucket] = count
+    result = []
+    for question_id, text, topic, correct_answer, stats in rows:
+        options = {label: getattr(stats, column) for label, column in OPTION_COLUMNS.items()}
+        if stats.option_other:
+            options['Other'] = stats.option_other
+        result.append({
+            'id': question_id, 'text': text, 'topic': topic, 'correct_answer': correct_answer,
+            'answers': stats.answers, 'correct': stats.correct, 'accuracy': _accuracy(stats.correct, stats.answers),
+            'options': options, 'median_seconds': median_seconds(histograms.get(question_id, {})),
+        })
+    return result
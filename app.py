@@ -1,36 +1,69 @@
-from flask import Flask, render_template, redirect, url_for, request, flash, jsonify, send_file, send_from_directory
+from flask import Flask, Response, abort, g, get_template_attribute, render_template, redirect, url_for, request, flash, jsonify, send_from_directory, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager, login_user, login_required, logout_user, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
+from sqlalchemy import func, or_, and_
 from datetime import datetime, timedelta
 import os
-import secrets
+import atexit
 import csv
 import json
 import logging
-from io import StringIO, BytesIO
+import queue
+import time
+import zlib
+import click
+from itertools import takewhile
+from io import StringIO
 from dotenv import load_dotenv
+import random
+import sqlite_profile
+import static_assets
+from logging_setup import configure_logging
+from metrics import RequestMetrics, render_cache_counters
+from sql_profiler import SQLProfiler
+from shared_state import SharedVersions, load_or_create_secret
 
 # --- Logging Setup ---
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s: %(message)s',
-    handlers=[
-        logging.FileHandler("error.log"),
-        logging.StreamHandler()
-    ]
-)
+configure_logging("error.log")
 
 load_dotenv()
 
-app = Flask(__name__)
+# INSTANCE_PATH moves the instance folder (secret, version stamps, locks) out of the source tree; must be absolute
+app = Flask(__name__, instance_path=os.environ.get('INSTANCE_PATH') or None)
 app.url_map.strict_slashes = False
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', secrets.token_hex(16))
+# One secret for every worker process: from the environment, else persisted in the instance folder
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or load_or_create_secret(os.path.join(app.instance_path, 'secret_key'))
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['QUESTION_IMAGE_FOLDER'] = 'static/question_images'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+# Group-commit answer submissions from a background writer (off by default)
+app.config['ANSWER_BATCH_WRITES'] = os.environ.get('ANSWER_BATCH_WRITES', '0').lower() in ('1', 'true', 'yes')
+app.config['ANSWER_BATCH_MAX_ROWS'] = int(os.environ.get('ANSWER_BATCH_MAX_ROWS', 100))
+app.config['ANSWER_BATCH_MAX_DELAY_MS'] = int(os.environ.get('ANSWER_BATCH_MAX_DELAY_MS', 5))
+app.config['ANSWER_BATCH_TIMEOUT'] = int(os.environ.get('ANSWER_BATCH_TIMEOUT', 30))
+app.config['FRAGMENT_CACHE_MAX_ENTRIES'] = int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES', 4096))
+app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL', 60))
+app.config['USER_CACHE_MAX_ENTRIES'] = int(os.environ.get('USER_CACHE_MAX_ENTRIES', 10000))
+# Password hashing runs in a process pool; changing the method/cost rehashes on next login
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1)))
+app.config['PASSWORD_HASH_MAX_PENDING'] = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 32))
+app.config['PASSWORD_HASH_TIMEOUT'] = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+app.config['PASSWORD_HASH_RETRY_AFTER'] = int(os.environ.get('PASSWORD_HASH_RETRY_AFTER', 3))
+# Answers submitted this long after a timed question's deadline are marked expired
+app.config['ANSWER_EXPIRY_GRACE_SECONDS'] = int(os.environ.get('ANSWER_EXPIRY_GRACE_SECONDS', 30))
+app.config['STUDENT_FEED_PAGE_SIZE'] = int(os.environ.get('STUDENT_FEED_PAGE_SIZE', 20))
+app.config['QUESTION_SEARCH_PAGE_SIZE'] = int(os.environ.get('QUESTION_SEARCH_PAGE_SIZE', 20))
+app.config['QUESTION_CACHE_MAX_BYTES'] = int(os.environ.get('QUESTION_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+app.config['NOTIFICATION_STREAM_LIMIT'] = int(os.environ.get('NOTIFICATION_STREAM_LIMIT', 4))
+app.config['NOTIFICATION_STREAM_SECONDS'] = int(os.environ.get('NOTIFICATION_STREAM_SECONDS', 300))
+# Retention and database upkeep (see maintenance.py); the background scheduler is off unless an interval is set
+app.config['NOTIFICATION_RETENTION_DAYS'] = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', 30))
+app.config['ANSWER_ARCHIVE_DAYS'] = int(os.environ.get('ANSWER_ARCHIVE_DAYS', 0))
+app.config['MAINTENANCE_BATCH_SIZE'] = int(os.environ.get('MAINTENANCE_BATCH_SIZE', 500))
+app.config['MAINTENANCE_BATCH_PAUSE_MS'] = int(os.environ.get('MAINTENANCE_BATCH_PAUSE_MS', 50))
+app.config['MAINTENANCE_INTERVAL_MINUTES'] = int(os.environ.get('MAINTENANCE_INTERVAL_MINUTES', 0))
 
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['QUESTION_IMAGE_FOLDER'], exist_ok=True)
@@ -44,24 +77,107 @@ elif not db_url.startswith('sqlite://') and not db_url.startswith('postgresql://
     # Default to sqlite if the provided URL is invalid or from old migrations
     db_url = 'sqlite:///local.db'
 
+# Request log sampling: skip static assets and polling endpoints, log a fraction of the rest
+app.config['LOG_REQUEST_SAMPLE_RATE'] = float(os.environ.get('LOG_REQUEST_SAMPLE_RATE', 1.0))
+app.config['LOG_SKIP_STATIC'] = os.environ.get('LOG_SKIP_STATIC', '1').lower() in ('1', 'true', 'yes')
+app.config['LOG_SKIP_POLLING'] = os.environ.get('LOG_SKIP_POLLING', '1').lower() in ('1', 'true', 'yes')
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+# Per-request SQL profiling (adds an X-SQL-Profile header and /admin/sql-profile); off by default
+app.config['SQL_PROFILER'] = os.environ.get('SQL_PROFILER', '0').lower() in ('1', 'true', 'yes')
+
 app.config['SQLALCHEMY_DATABASE_URI'] = db_url
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {"pool_pre_ping": True}
+sqlite_profile.load_config(app, os.environ)
 app.config['REMEMBER_COOKIE_DURATION'] = timedelta(days=7)
 app.config['SESSION_PERMANENT'] = True
 app.config['SESSION_COOKIE_SECURE'] = os.environ.get('PORT') != '5000' # True if on Render (HTTPS)
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 
-from models import db, User, Question, Answer, Attempt, Classroom, MeetLink, Notification
+from models import db, answer_history, User, Question, Answer, AnswerArchive, Attempt, Classroom, MeetLink, Notification
+from batch_writer import BatchWriter
+from notification_hub import NotificationHub, format_sse
+from file_store import ContentStore, is_content_key
+from fragment_cache import FragmentCache
+from question_cache import QuestionCache
+from user_cache import UserCache
+from password_hasher import PasswordHasher, HasherBusy
+from question_import import detect_format, import_questions
+from analytics import forget_question, leaderboard_topics, overall_leaderboard, question_analytics, \
+    rebuild_question_stats, rebuild_topic_stats, record_submission, topic_leaderboard
+from regrade import regrade
+from search import index_missing, index_questions, question_facets, rebuild_search_index, search_questions, \
+    unindex_question
+from attempts import expired_clause, start_attempt, start_attempts
+from maintenance import MaintenanceScheduler, archive_answers, clean_orphans, find_orphans, \
+    mark_all_notifications_read, optimize_database, purge_notifications, run_maintenance
+from student_stats import record_answer, student_summary, rebuild_student_stats
 
 db.init_app(app)
+sqlite_profile.init_app(app)
+sql_profiler = SQLProfiler(app)
 migrate = Migrate(app, db)
+upload_store = ContentStore('uploads', app.config['UPLOAD_FOLDER'])
+question_image_store = ContentStore('question_images', app.config['QUESTION_IMAGE_FOLDER'])
+question_cache = QuestionCache(max_bytes=app.config['QUESTION_CACHE_MAX_BYTES'])
+fragment_cache = FragmentCache(max_entries=app.config['FRAGMENT_CACHE_MAX_ENTRIES'])
+app.jinja_env.globals['question_fragment'] = fragment_cache.render
+user_cache = UserCache(ttl=app.config['USER_CACHE_TTL'], max_entries=app.config['USER_CACHE_MAX_ENTRIES'])
+user_cache.watch(on_commit=lambda: shared_versions.bump('users'))
+password_hasher = PasswordHasher(method=app.config['PASSWORD_HASH_METHOD'],
+                                 workers=app.config['PASSWORD_HASH_WORKERS'],
+                                 max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+                                 timeout=app.config['PASSWORD_HASH_TIMEOUT'])
+notification_hub = NotificationHub(max_subscribers=app.config['NOTIFICATION_STREAM_LIMIT'])
+maintenance_scheduler = MaintenanceScheduler(app, interval=app.config['MAINTENANCE_INTERVAL_MINUTES'] * 60,
+                                             lock_path=os.path.join(app.instance_path, 'maintenance.lock'))
+
+# Cache invalidation across worker processes (and CLI commands) via version files in the instance folder
+shared_versions = SharedVersions(os.path.join(app.instance_path, 'versions'))
+shared_versions.register('questions', question_cache.invalidate)
+shared_versions.register('users', user_cache.invalidate)
+
+request_metrics = RequestMetrics()
+POLLING_ENDPOINTS = {'get_notifications', 'notification_stream', 'metrics', 'health'}
+
+static_assets.init_app(app)
 
 login_manager = LoginManager()
 @app.before_request
 def log_request_info():
-    logging.info(f"Request: {request.method} {request.path}")
+    g.request_started = time.perf_counter()
+    request_metrics.request_started()
+    shared_versions.sync()
+    maintenance_scheduler.ensure_started()
+    if app.config['LOG_SKIP_STATIC'] and request.endpoint == 'static': return
+    if app.config['LOG_SKIP_POLLING'] and request.endpoint in POLLING_ENDPOINTS: return
+    if random.random() < app.config['LOG_REQUEST_SAMPLE_RATE']:
+        logging.info(f"Request: {request.method} {request.path}")
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is not None:
+        request_metrics.observe(request.endpoint or 'unmatched', request.method, response.status_code,
+                                time.perf_counter() - started)
+    return response
+
+@app.after_request
+def conditional_html(response):
+    # Let browsers revalidate rendered pages cheaply: ETag + 304 when nothing changed
+    if request.method == 'GET' and response.status_code == 200 and response.mimetype == 'text/html' \
+            and not response.is_streamed:
+        response.headers.setdefault('Cache-Control', 'private, no-cache')
+        response.vary.add('Cookie')
+        response.add_etag()
+        response.make_conditional(request)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if g.pop('request_started', None) is not None:
+        request_metrics.request_finished()
 
 login_manager.init_app(app)
 login_manager.login_view = 'login'
@@ -82,18 +198,176 @@ def handle_500(e):
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return user_cache.get(int(user_id))
 
 # --- Helpers ---
+def questions_changed(question_id=None):
+    # Call after committing question writes; other processes reload on their next request
+    question_cache.invalidate()
+    if question_id is not None:
+        fragment_cache.invalidate(question_id)
+    shared_versions.bump('questions')
+
 def allowed_file(filename):
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'doc', 'docx'}
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def file_extension(filename):
+    return filename.rsplit('.', 1)[1].lower()
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+def send_stored_file(folder, key, public):
+    response = send_from_directory(folder, key)
+    if is_content_key(key):
+        # Content-addressed names never change meaning, so clients may cache forever
+        scope = 'public' if public else 'private'
+        response.headers['Cache-Control'] = f'{scope}, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return response
+
+SUBMISSIONS_PAGE_SIZE = 50
+
+def encode_cursor(submitted_at, row_id):
+    return f"{submitted_at.strftime('%Y%m%d%H%M%S%f')}-{row_id}"
+
+def decode_cursor(cursor):
+    try:
+        stamp, row_id = cursor.split('-', 1)
+        return datetime.strptime(stamp, '%Y%m%d%H%M%S%f'), int(row_id)
+    except (AttributeError, ValueError):
+        return None
+
+FEED_EPOCH = datetime(1970, 1, 1)
+
+def feed_key(q):
+    # Same (created_at, id) ordering the question cache is sorted by, newest first
+    return (q.created_at or FEED_EPOCH, q.id)
+
+def student_feed_page(student_id, cursor=None, limit=None, query='', topic=''):
+    # One page of the question feed; answers/attempts are loaded for that page only.
+    # The plain feed is keyset-paginated; searches page through ranked results by number.
+    limit = limit or app.config['STUDENT_FEED_PAGE_SIZE']
+    if query or topic:
+        number = int(cursor) if cursor and cursor.isdigit() else 1
+        results = search_questions(query, topic or None, number, limit)
+        page, start = results['questions'], (results['page'] - 1) * limit
+        next_cursor = str(number + 1) if number < results['pages'] else None
+    else:
+        questions = question_cache.all()
+        start = 0
+        after = decode_cursor(cursor) if cursor else None
+        if after:
+            start = next((i for i, q in enumerate(questions) if feed_key(q) < after), len(questions))
+        page = questions[start:start + limit]
+        next_cursor = encode_cursor(*feed_key(page[-1])) if page and start + limit < len(questions) else None
+    ids = [q.id for q in page]
+    answers, attempts = {}, {}
+    if ids:
+        answers = {a.question_id: a for a in
+                   Answer.query.filter(Answer.student_id == student_id, Answer.question_id.in_(ids))}
+        archived = [i for i in ids if i not in answers]
+        if archived:
+            answers.update((a.question_id, a) for a in AnswerArchive.query.filter(
+                AnswerArchive.student_id == student_id, AnswerArchive.question_id.in_(archived)))
+        attempts = {at.question_id: at.start_time.timestamp() * 1000 for at in
+                    Attempt.query.filter(Attempt.student_id == student_id, Attempt.question_id.in_(ids))}
+    feed = [{'question': q, 'position': start + i + 1, 'answer': answers.get(q.id)} for i, q in enumerate(page)]
+    return feed, next_cursor, attempts
+
+def parse_date_arg(value, end_of_day=False):
+    try:
+        day = datetime.strptime(value, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        return None
+    return day + timedelta(days=1) if end_of_day else day
+
+def submission_filters(args):
+    outcome = args.get('outcome')
+    return {
+        'student': (args.get('student') or '').strip(),
+        'question_id': args.get('question_id', type=int),
+        'topic': (args.get('topic') or '').strip(),
+        'outcome': outcome if outcome in ('correct', 'incorrect') else '',
+        'date_from': args.get('date_from') if parse_date_arg(args.get('date_from')) else '',
+        'date_to': args.get('date_to') if parse_date_arg(args.get('date_to')) else '',
+    }
+
+def submissions_query(filters):
+    # One joined SELECT for the rows and the student/question columns they display
+    query = db.session.query(
+        Answer.id, Answer.submitted_at, Answer.is_correct, Answer.file_path, Answer.selected_option,
+        User.username, User.full_name, Question.text.label('question_text'), Question.topic
+    ).outerjoin(User, Answer.student_id == User.id).outerjoin(Question, Answer.question_id == Question.id)
+    if filters['student']:
+        pattern = f"%{filters['student']}%"
+        query = query.filter(or_(User.username.ilike(pattern), User.full_name.ilike(pattern)))
+    if filters['question_id']:
+        query = query.filter(Answer.question_id == filters['question_id'])
+    if filters['topic']:
+        query = query.filter(Question.topic == filters['topic'])
+    if filters['outcome'] == 'correct':
+        query = query.filter(Answer.is_correct.is_(True))
+    elif filters['outcome'] == 'incorrect':
+        query = query.filter(or_(Answer.is_correct.is_(False), Answer.is_correct.is_(None)))
+    if filters['date_from']:
+        query = query.filter(Answer.submitted_at >= parse_date_arg(filters['date_from']))
+    if filters['date_to']:
+        query = query.filter(Answer.submitted_at < parse_date_arg(filters['date_to'], end_of_day=True))
+    return query
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+def csv_stream(header, rows):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    # Send the header on its own so the download starts before the first batch is read
+    yield buffer.getvalue().encode()
+    buffer.seek(0)
+    buffer.truncate()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def csv_download(filename, header, rows):
+    chunks = csv_stream(header, rows)
+    mimetype = 'text/csv'
+    if request.args.get('gzip') in ('1', 'true', 'yes'):
+        chunks = gzip_stream(chunks)
+        mimetype = 'application/gzip'
+        filename += '.gz'
+    return Response(stream_with_context(chunks), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
 # --- Routes ---
 @app.route('/health')
 def health():
     return jsonify({"status": "online", "database": app.config['SQLALCHEMY_DATABASE_URI'].split(':')[0]})
 
+@app.route('/metrics')
+def metrics():
+    token = app.config['METRICS_TOKEN']
+    # Admins only, unless a scraper presents METRICS_TOKEN
+    authorized = (token and request.headers.get('Authorization') == f'Bearer {token}') \
+        or (current_user.is_authenticated and current_user.role == 'admin')
+    if not authorized: return Response('Forbidden', status=403)
+    caches = {'user': user_cache, 'question_fragment': fragment_cache}
+    return Response(request_metrics.render() + render_cache_counters(caches), mimetype='text/plain; version=0.0.4')
+
 @app.route('/')
 def index():
     if current_user.is_authenticated:
@@ -103,14 +377,28 @@ def index():
     logging.info("User not authenticated, redirecting to login")
     return redirect(url_for('login'))
 
+def hasher_busy(template):
+    # Shed load instead of queueing behind a login storm
+    logging.warning("Password hasher saturated, answering 503")
+    flash('The server is busy signing people in. Please try again in a few seconds.', 'warning')
+    retry_after = app.config['PASSWORD_HASH_RETRY_AFTER']
+    return render_template(template), 503, {'Retry-After': str(retry_after)}
+
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         username = request.form.get('username')
         password = request.form.get('password')
         user = User.query.filter_by(username=username).first()
-        if user and check_password_hash(user.password, password):
+        try:
+            matches, new_hash = password_hasher.verify(user.password, password) if user else (False, None)
+        except HasherBusy:
+            return hasher_busy('login.html')
+        if matches:
             logging.info(f"Login success for user: {username} (Role: {user.role})")
+            if new_hash:
+                user.password = new_hash
+                db.session.commit()
             login_user(user, remember=True)
             target = url_for('index')
             logging.info(f"Redirecting to: {target}")
@@ -128,7 +416,11 @@ def register():
         if User.query.filter_by(username=username).first():
             flash('Username taken', 'warning')
             return redirect(url_for('register'))
-        new_user = User(username=username, full_name=full_name, password=generate_password_hash(password))
+        try:
+            password_hash = password_hasher.hash(password)
+        except HasherBusy:
+            return hasher_busy('register.html')
+        new_user = User(username=username, full_name=full_name, password=password_hash)
         db.session.add(new_user)
         try:
             db.session.commit()
@@ -149,7 +441,7 @@ def logout():
 @login_required
 def admin_dashboard():
     if current_user.role != 'admin': return redirect(url_for('index'))
-    questions = Question.query.order_by(Question.created_at.desc()).all()
+    questions = question_cache.all()
     submissions = Answer.query.order_by(Answer.submitted_at.desc()).limit(10).all()
     all_users = User.query.filter_by(role='student').all()
     classroom = Classroom.query.first()
@@ -170,8 +462,7 @@ def post_question():
         if 'image' in request.files:
             file = request.files['image']
             if file and allowed_file(file.filename):
-                image_filename = secure_filename(file.filename)
-                file.save(os.path.join(app.config['QUESTION_IMAGE_FOLDER'], image_filename))
+                image_filename = question_image_store.save(file, file_extension(file.filename))
         
         q = Question(
             text=request.form.get('text'),
@@ -186,17 +477,39 @@ def post_question():
             image_file=image_filename
         )
         db.session.add(q)
+        db.session.flush()
+        index_questions([q.id])
         db.session.commit()
+        questions_changed()
         flash('Question posted!', 'success')
         return redirect(url_for('admin_dashboard'))
     return render_template('post_question.html')
 
+@app.route('/admin/import-questions', methods=['POST'])
+@login_required
+def import_questions_api():
+    if current_user.role != 'admin': return jsonify({'error': 'Forbidden'}), 403
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({'error': 'Missing file'}), 400
+    fmt = request.args.get('format') or detect_format(upload.filename)
+    dry_run = request.args.get('dry_run') in ('1', 'true', 'yes')
+    report = import_questions(upload.stream, fmt, dry_run=dry_run)
+    if report['inserted']:
+        index_missing()
+        db.session.commit()
+        questions_changed()
+    logging.info(f"Question import by {current_user.username}: {report['inserted']} inserted, "
+                 f"{report['duplicates']} duplicates, {len(report['errors'])} rejected")
+    return jsonify(report)
+
 @app.route('/admin/edit-question/<int:question_id>', methods=['GET', 'POST'])
 @login_required
 def edit_question(question_id):
     if current_user.role != 'admin': return redirect(url_for('index'))
     q = Question.query.get_or_404(question_id)
     if request.method == 'POST':
+        old_topic, old_key = q.topic, q.correct_answer
         q.text = request.form.get('text')
         q.topic = request.form.get('topic')
         q.option_a = request.form.get('option_a')
@@ -206,8 +519,25 @@ def edit_question(question_id):
         q.correct_answer = request.form.get('correct_answer')
         q.explanation = request.form.get('explanation')
         q.time_limit = request.form.get('time_limit', type=int) or 10
+        if q.topic != old_topic:
+            db.session.flush()
+            answers = answer_history()
+            rebuild_topic_stats(student_id for (student_id,) in db.session.query(answers.c.student_id)
+                                .filter(answers.c.question_id == question_id).distinct())
+        db.session.flush()
+        index_questions([question_id])
+        report = None
+        if q.correct_answer != old_key:
+            db.session.flush()
+            report = regrade([question_id])
         db.session.commit()
-        flash('Question updated!', 'success')
+        questions_changed(question_id)
+        if report and report['changed']:
+            shared_versions.bump('notifications')
+            flash(f"Question updated! Regraded {report['changed']} answers "
+                  f"({report['to_correct']} now correct, {report['to_incorrect']} now incorrect).", 'success')
+        else:
+            flash('Question updated!', 'success')
         return redirect(url_for('admin_dashboard'))
     return render_template('edit_question.html', q=q)
 
@@ -216,8 +546,24 @@ def edit_question(question_id):
 def delete_question(question_id):
     if current_user.role != 'admin': return redirect(url_for('index'))
     q = Question.query.get_or_404(question_id)
+    answer_rows = db.session.query(Answer.student_id, Answer.file_path).filter_by(question_id=question_id).all() + \
+        db.session.query(AnswerArchive.student_id, AnswerArchive.file_path).filter_by(question_id=question_id).all()
+    affected_students = {row.student_id for row in answer_rows}
+    upload_store.release(row.file_path for row in answer_rows if row.file_path)
+    if q.image_file:
+        question_image_store.release([q.image_file])
+    # Rows referencing the question go first so enforced foreign keys never see a dangling reference
+    forget_question(question_id)
+    db.session.execute(db.delete(AnswerArchive).where(AnswerArchive.question_id == question_id))
+    db.session.execute(db.update(Notification).where(Notification.question_id == question_id)
+                       .values(question_id=None).execution_options(synchronize_session=False))
     db.session.delete(q)
+    db.session.flush()
+    rebuild_student_stats(affected_students)
+    rebuild_topic_stats(affected_students)
+    unindex_question(question_id)
     db.session.commit()
+    questions_changed(question_id)
     flash('Question deleted!', 'info')
     return redirect(url_for('admin_questions_dashboard'))
 
@@ -280,15 +626,95 @@ def refresh_classroom():
 @login_required
 def admin_questions_dashboard():
     if current_user.role != 'admin': return redirect(url_for('index'))
-    questions = Question.query.order_by(Question.created_at.desc()).all()
-    return render_template('admin_questions.html', active_questions=questions)
+    search = {'q': (request.args.get('q') or '').strip(), 'topic': (request.args.get('topic') or '').strip()}
+    results = search_questions(search['q'], search['topic'] or None, request.args.get('page', 1, type=int),
+                               app.config['QUESTION_SEARCH_PAGE_SIZE'])
+    return render_template('admin_questions.html', active_questions=results['questions'], results=results,
+                           search=search, total_questions=db.session.query(func.count(Question.id)).scalar())
 
 @app.route('/admin/submissions')
 @login_required
 def admin_submissions_dashboard():
     if current_user.role != 'admin': return redirect(url_for('index'))
-    submissions = Answer.query.order_by(Answer.submitted_at.desc()).all()
-    return render_template('admin_submissions.html', results=submissions)
+    filters = submission_filters(request.args)
+    query = submissions_query(filters)
+    total = query.order_by(None).count()
+
+    position = decode_cursor(request.args.get('cursor'))
+    if position:
+        submitted_at, row_id = position
+        query = query.filter(or_(Answer.submitted_at < submitted_at,
+                                 and_(Answer.submitted_at == submitted_at, Answer.id < row_id)))
+    rows = query.order_by(Answer.submitted_at.desc(), Answer.id.desc()).limit(SUBMISSIONS_PAGE_SIZE + 1).all()
+
+    next_cursor = None
+    if len(rows) > SUBMISSIONS_PAGE_SIZE:
+        rows = rows[:SUBMISSIONS_PAGE_SIZE]
+        next_cursor = encode_cursor(rows[-1].submitted_at, rows[-1].id)
+    topics = [t for (t,) in db.session.query(Question.topic).distinct().order_by(Question.topic) if t]
+    return render_template('admin_submissions.html',
+                          results=rows,
+                          total=total,
+                          filters=filters,
+                          filter_args={k: v for k, v in filters.items() if v},
+                          topics=topics,
+                          next_cursor=next_cursor,
+                          is_first_page=position is None)
+
+@app.route('/api/questions/search')
+@login_required
+def question_search_api():
+    per_page = min(max(request.args.get('per_page', app.config['QUESTION_SEARCH_PAGE_SIZE'], type=int), 1), 100)
+    results = search_questions((request.args.get('q') or '').strip(), (request.args.get('topic') or '').strip() or None,
+                               request.args.get('page', 1, type=int), per_page)
+    # Students never see answer keys or explanations through search
+    fields = ('id', 'text', 'topic', 'time_limit', 'created_at')
+    if current_user.role == 'admin':
+        fields += ('option_a', 'option_b', 'option_c', 'option_d', 'correct_answer', 'explanation')
+    results['questions'] = [{name: getattr(q, name) for name in fields} for q in results['questions']]
+    return jsonify(results)
+
+@app.route('/admin/regrade', methods=['POST'])
+@login_required
+def regrade_answers():
+    if current_user.role != 'admin': return jsonify({'error': 'Forbidden'}), 403
+    data = request.get_json(silent=True) or {}
+    try:
+        question_ids = [int(q_id) for q_id in data.get('question_ids') or []]
+    except (TypeError, ValueError):
+        return jsonify({'error': 'question_ids must be a list of ids'}), 400
+    topic = (data.get('topic') or '').strip() or None
+    if not question_ids and not topic and data.get('all') is not True:
+        return jsonify({'error': 'Give question_ids, a topic, or "all": true'}), 400
+    dry_run = data.get('dry_run') is True or request.args.get('dry_run') in ('1', 'true', 'yes')
+    started = time.perf_counter()
+    report = regrade(question_ids or None, topic, dry_run=dry_run)
+    db.session.commit()
+    report['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    if report['changed'] and not dry_run:
+        shared_versions.bump('notifications')
+        logging.info(f"Regrade by {current_user.username}: {report['changed']} answers changed")
+    return jsonify(report)
+
+@app.route('/admin/leaderboard')
+@login_required
+def admin_leaderboard():
+    if current_user.role != 'admin': return redirect(url_for('index'))
+    topic = (request.args.get('topic') or '').strip()
+    rows = topic_leaderboard(topic) if topic else overall_leaderboard()
+    return render_template('admin_leaderboard.html', rows=rows, topic=topic, topics=leaderboard_topics())
+
+@app.route('/admin/question-stats')
+@login_required
+def admin_question_stats():
+    if current_user.role != 'admin': return redirect(url_for('index'))
+    return render_template('admin_question_stats.html', questions=question_analytics())
+
+@app.route('/admin/sql-profile')
+@login_required
+def admin_sql_profile():
+    if current_user.role != 'admin': return redirect(url_for('index'))
+    return render_template('admin_sql_profile.html', enabled=sql_profiler.enabled, report=sql_profiler.report())
 
 @app.route('/admin/members')
 @login_required
@@ -301,54 +727,108 @@ def admin_members_dashboard():
 @login_required
 def export_members():
     if current_user.role != 'admin': return redirect(url_for('index'))
-    members = User.query.filter_by(role='student').all()
-    si = StringIO()
-    cw = csv.writer(si)
-    cw.writerow(['Full Name', 'Username', 'Registration Date'])
-    for m in members:
-        cw.writerow([m.full_name, m.username, m.created_at])
-    output = si.getvalue()
-    return send_file(BytesIO(output.encode()), mimetype='text/csv', as_attachment=True, download_name='members.csv')
+    members = db.session.query(User.full_name, User.username, User.created_at) \
+        .filter(User.role == 'student').order_by(User.id) \
+        .execution_options(stream_results=True).yield_per(EXPORT_BATCH_SIZE)
+    return csv_download('members.csv', ['Full Name', 'Username', 'Registration Date'], members)
 
 @app.route('/admin/export-submissions')
 @login_required
 def export_submissions():
     if current_user.role != 'admin': return redirect(url_for('index'))
-    submissions = Answer.query.all()
-    si = StringIO()
-    cw = csv.writer(si)
-    cw.writerow(['Student', 'Question', 'Outcome', 'Timestamp'])
-    for s in submissions:
-        student_name = s.student.full_name if s.student else "Deleted Student"
-        q_text = s.question.text[:50] if s.question else "Deleted Question"
-        cw.writerow([student_name, q_text, 'PASS' if s.is_correct else 'FAIL', s.submitted_at])
-    output = si.getvalue()
-    return send_file(BytesIO(output.encode()), mimetype='text/csv', as_attachment=True, download_name='submissions.csv')
-
-@app.route('/download/<filename>')
+    query = submissions_query(submission_filters(request.args)).order_by(Answer.id) \
+        .execution_options(stream_results=True).yield_per(EXPORT_BATCH_SIZE)
+    rows = ([
+        r.full_name if r.username is not None else "Deleted Student",
+        r.question_text[:50] if r.question_text is not None else "Deleted Question",
+        'PASS' if r.is_correct else 'FAIL',
+        r.submitted_at
+    ] for r in query)
+    return csv_download('submissions.csv', ['Student', 'Question', 'Outcome', 'Timestamp'], rows)
+
+@app.route('/download/<path:filename>')
 @login_required
 def download_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    return send_stored_file(app.config['UPLOAD_FOLDER'], filename, public=False)
+
+@app.route('/question-image/<path:key>')
+def question_image(key):
+    return send_stored_file(app.config['QUESTION_IMAGE_FOLDER'], key, public=True)
+
+def notification_payload(student_name, question_text, is_correct, created_at):
+    return {
+        'student_name': student_name,
+        'question_text': question_text or 'Question',
+        'is_correct': is_correct,
+        'created_at': created_at.strftime('%H:%M') if created_at else '--:--'
+    }
+
+def unread_notifications():
+    notifs = Notification.query.filter_by(read=False).order_by(Notification.created_at.desc()).limit(20).all()
+    notif_list = [notification_payload(n.student_name, n.question_text, n.is_correct, n.created_at) for n in notifs]
+    return {'count': len(notifs), 'notifications': notif_list}
 
 @app.route('/admin/notifications')
 @login_required
 def get_notifications():
     if current_user.role != 'admin': return jsonify({'count': 0, 'notifications': []})
-    notifs = Notification.query.filter_by(read=False).order_by(Notification.created_at.desc()).limit(20).all()
-    notif_list = [{
-        'student_name': n.student_name,
-        'question_text': n.question_text or 'Question',
-        'is_correct': n.is_correct,
-        'created_at': n.created_at.strftime('%H:%M') if n.created_at else '--:--'
-    } for n in notifs]
-    return jsonify({'count': len(notifs), 'notifications': notif_list})
+    return jsonify(unread_notifications())
+
+# How often an idle stream checks whether another worker changed the notifications
+NOTIFICATION_SHARED_POLL_SECONDS = 3
+NOTIFICATION_BUMP_DELAY_SECONDS = 1
+
+@app.route('/admin/notifications/stream')
+@login_required
+def notification_stream():
+    if current_user.role != 'admin': return jsonify({'error': 'Forbidden'}), 403
+    subscription = notification_hub.subscribe()
+    if subscription is None:
+        return Response('Stream capacity reached, use polling', status=503, headers={'Retry-After': '30'})
+    snapshot = unread_notifications()
+    # Release the DB session now; the stream only queries again when another worker changes notifications
+    db.session.remove()
+    max_seconds = app.config['NOTIFICATION_STREAM_SECONDS']
+
+    def events():
+        try:
+            yield 'retry: 3000\n\n' + format_sse('snapshot', snapshot)
+            seen = shared_versions.stamp('notifications')
+            deadline = time.monotonic() + max_seconds
+            idle = 0
+            while time.monotonic() < deadline:
+                try:
+                    event, data = subscription.get(timeout=NOTIFICATION_SHARED_POLL_SECONDS)
+                except queue.Empty:
+                    stamp = shared_versions.stamp('notifications')
+                    changed, seen = shared_versions.changed_elsewhere('notifications', seen, stamp), stamp
+                    if changed:
+                        # Changed by another worker process: resend the current state
+                        idle = 0
+                        with app.app_context():
+                            current = unread_notifications()
+                        yield format_sse('snapshot', current)
+                        continue
+                    idle += NOTIFICATION_SHARED_POLL_SECONDS
+                    if idle >= 15:
+                        idle = 0
+                        yield ': keepalive\n\n'
+                    continue
+                idle = 0
+                yield format_sse(event, data)
+        finally:
+            notification_hub.unsubscribe(subscription)
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/admin/notifications/mark_read', methods=['POST'])
 @login_required
 def mark_notifications_read():
     if current_user.role != 'admin': return jsonify({'status': 'ok'})
-    Notification.query.filter_by(read=False).update({Notification.read: True})
-    db.session.commit()
+    if mark_all_notifications_read(app.config['MAINTENANCE_BATCH_SIZE']):
+        notification_hub.publish('cleared')
+        shared_versions.bump('notifications')
     return jsonify({'status': 'ok'})
 
 @app.route('/student/dashboard')
@@ -358,82 +838,297 @@ def student_dashboard():
     # Fixed today filter for SQLite
     start_of_today = datetime.combine(today, datetime.min.time())
     
-    questions = Question.query.order_by(Question.created_at.desc()).all()
-    answers = Answer.query.filter_by(student_id=current_user.id).all()
-    user_answers = {a.question_id: a for a in answers}
-    
-    attempts = Attempt.query.filter_by(student_id=current_user.id).all()
-    user_attempts = {at.question_id: at.start_time.timestamp() * 1000 for at in attempts}
+    search = {'q': (request.args.get('q') or '').strip(), 'topic': (request.args.get('topic') or '').strip()}
+    feed, next_cursor, user_attempts = student_feed_page(current_user.id, query=search['q'], topic=search['topic'])
+    topics = sorted(f['topic'] for f in question_facets())
     
     classroom = Classroom.query.first()
     active_meet_links = MeetLink.query.filter_by(is_active=True).all()
     
-    stats = {
-        'solved': len(answers),
-        'correct': sum(1 for a in answers if a.is_correct),
-        'incorrect': sum(1 for a in answers if not a.is_correct),
-        'accuracy': (sum(1 for a in answers if a.is_correct) / len(answers) * 100) if answers else 0,
-        'today_solved': sum(1 for a in answers if a.submitted_at >= start_of_today),
-        'today_total': Question.query.filter(Question.created_at >= start_of_today).count(),
-        'today_remaining': 0
-    }
+    stats = student_summary(current_user.id, today)
+    stats['today_total'] = sum(1 for _ in takewhile(lambda q: q.created_at and q.created_at >= start_of_today, question_cache.all()))
     stats['today_remaining'] = max(0, stats['today_total'] - stats['today_solved'])
     
     return render_template('student_dashboard.html', 
-                          questions=questions, 
-                          user_answers=user_answers, 
+                          feed=feed, 
+                          next_cursor=next_cursor, 
+                          search=search,
+                          topics=topics, 
                           user_attempts=user_attempts, 
                           classroom=classroom,
                           active_meet_links=active_meet_links,
                           stats=stats,
                           server_now=datetime.utcnow().timestamp() * 1000)
 
+@app.route('/api/student/questions')
+@login_required
+def student_questions_api():
+    limit = min(max(request.args.get('limit', app.config['STUDENT_FEED_PAGE_SIZE'], type=int), 1), 100)
+    feed, next_cursor, user_attempts = student_feed_page(current_user.id, request.args.get('cursor'), limit,
+                                                         (request.args.get('q') or '').strip(),
+                                                         (request.args.get('topic') or '').strip())
+    card = get_template_attribute('_student_card.html', 'card')
+    questions = []
+    for item in feed:
+        q, ans = item['question'], item['answer']
+        questions.append({
+            'id': q.id,
+            'topic': q.topic,
+            'text': q.text,
+            'time_limit': q.time_limit,
+            'position': item['position'],
+            'answered': ans is not None,
+            'is_correct': ans.is_correct if ans else None,
+            'is_expired': ans.is_expired if ans else None,
+            'selected_option': ans.selected_option if ans else None,
+            'attempt_start': user_attempts.get(q.id),
+            'html': str(card(q, item['position'], ans)),
+        })
+    response = jsonify({'questions': questions, 'next_cursor': next_cursor})
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Cookie')
+    response.add_etag()
+    return response.make_conditional(request)
+
 @app.route('/student/start_attempt', methods=['POST'])
 @login_required
 def student_start_attempt():
     data = request.get_json() or {}
-    question_id = data.get('question_id')
-    if not question_id: return jsonify({'error': 'Missing question_id'}), 400
-    
-    attempt = Attempt.query.filter_by(student_id=current_user.id, question_id=question_id).first()
-    if not attempt:
-        attempt = Attempt(student_id=current_user.id, question_id=question_id)
-        db.session.add(attempt)
-        db.session.commit()
-    return jsonify({'start_time': attempt.start_time.timestamp() * 1000})
+    try:
+        question_id = int(data.get('question_id'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Missing question_id'}), 400
+    if question_cache.get(question_id) is None: return jsonify({'error': 'Unknown question'}), 404
+    start_time = start_attempt(current_user.id, question_id)
+    db.session.commit()
+    return jsonify({'start_time': start_time.timestamp() * 1000})
+
+@app.route('/student/start_attempts', methods=['POST'])
+@login_required
+def student_start_attempts():
+    # Batch variant: start (or look up) the timers of several questions at once
+    data = request.get_json() or {}
+    try:
+        question_ids = {int(q_id) for q_id in data.get('question_ids') or []}
+    except (TypeError, ValueError):
+        return jsonify({'error': 'question_ids must be a list of ids'}), 400
+    if not question_ids: return jsonify({'error': 'Missing question_ids'}), 400
+    if len(question_ids) > 100: return jsonify({'error': 'Too many question_ids'}), 400
+    start_times = start_attempts(current_user.id, [q_id for q_id in question_ids if question_cache.get(q_id)])
+    db.session.commit()
+    return jsonify({'start_times': {q_id: start.timestamp() * 1000 for q_id, start in start_times.items()}})
+
+def save_submission(submission):
+    # Stages the answer, its admin notification and the stats update; the caller commits
+    db.session.add(Answer(
+        student_id=submission['student_id'],
+        question_id=submission['question_id'],
+        selected_option=submission['selected_option'],
+        is_correct=submission['is_correct'],
+        file_path=submission['file_path'],
+        submitted_at=submission['submitted_at'],
+        # Evaluated inside the INSERT against the attempt's start time
+        is_expired=expired_clause(submission['student_id'], submission['question_id'], submission['time_limit'],
+                                  submission['submitted_at'], app.config['ANSWER_EXPIRY_GRACE_SECONDS'])
+    ))
+    db.session.add(Notification(
+        type='submission',
+        student_id=submission['student_id'],
+        student_name=submission['student_name'],
+        question_id=submission['question_id'],
+        question_text=submission['question_text'],
+        is_correct=submission['is_correct'],
+        created_at=submission['submitted_at']
+    ))
+    record_answer(submission['student_id'], submission['is_correct'], submission['submitted_at'])
+    record_submission(submission['student_id'], submission['question_id'], submission['topic'],
+                      submission['selected_option'], submission['is_correct'], submission['submitted_at'])
+    if submission['file_path']:
+        upload_store.retain(submission['file_path'], submission['file_size'])
+    return submission
+
+def publish_submissions(submissions):
+    for sub in submissions:
+        notification_hub.publish('notification', notification_payload(
+            sub['student_name'], sub['question_text'], sub['is_correct'], sub['submitted_at']))
+    # Other workers' streams only look every few seconds: one stamp append per burst, off this thread
+    shared_versions.bump_soon('notifications', NOTIFICATION_BUMP_DELAY_SECONDS)
+
+submission_writer = BatchWriter(app, save_submission, on_commit=publish_submissions,
+                                max_batch=app.config['ANSWER_BATCH_MAX_ROWS'],
+                                max_delay=app.config['ANSWER_BATCH_MAX_DELAY_MS'] / 1000)
+atexit.register(submission_writer.stop)
 
 @app.route('/submit_answer', methods=['POST'])
 @login_required
 def submit_answer():
     q_id = request.form.get('question_id', type=int)
     ans = request.form.get('selected_option')
-    q = Question.query.get_or_404(q_id)
+    q = question_cache.get(q_id)
+    if q is None: abort(404)
     is_correct = ans == q.correct_answer
     
-    file_path = None
+    file_path, file_size = None, None
     if 'file' in request.files:
         file = request.files['file']
         if file and allowed_file(file.filename):
-            file_path = secure_filename(file.filename)
-            file.save(os.path.join(app.config['UPLOAD_FOLDER'], file_path))
+            file_path, file_size = upload_store.write(file, file_extension(file.filename))
     
-    answer = Answer(student_id=current_user.id, question_id=q_id, selected_option=ans, is_correct=is_correct, file_path=file_path)
-    db.session.add(answer)
-    
-    notif = Notification(
-        message=f"Submission from {current_user.full_name or current_user.username}", 
-        type='submission', 
-        student_id=current_user.id, 
-        student_name=current_user.full_name or current_user.username, 
-        question_id=q_id, 
-        question_text=q.text[:50],
-        is_correct=is_correct
-    )
-    db.session.add(notif)
-    
-    db.session.commit()
+    submission = {
+        'student_id': current_user.id,
+        'student_name': current_user.full_name or current_user.username,
+        'question_id': q_id,
+        'question_text': q.text[:50],
+        'topic': q.topic,
+        'time_limit': q.time_limit,
+        'selected_option': ans,
+        'is_correct': is_correct,
+        'file_path': file_path,
+        'file_size': file_size,
+        'submitted_at': datetime.utcnow(),
+    }
+    pending = submission_writer.submit(submission) if app.config['ANSWER_BATCH_WRITES'] else None
+    if pending is not None:
+        # Don't hold this request's read transaction open while the writer commits
+        db.session.commit()
+        pending.result(timeout=app.config['ANSWER_BATCH_TIMEOUT'])
+    else:
+        save_submission(submission)
+        db.session.commit()
+        publish_submissions([submission])
     return jsonify({'status': 'success', 'is_correct': is_correct})
 
+# --- CLI ---
+@app.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Backfill per-student statistics from the answers table."""
+    rows = rebuild_student_stats()
+    db.session.commit()
+    print(f"✅ Rebuilt statistics for {rows} students")
+
+@app.cli.command('rebuild-analytics')
+def rebuild_analytics_command():
+    """Recompute the topic leaderboards and per-question statistics from the answers table."""
+    topic_rows = rebuild_topic_stats()
+    questions = rebuild_question_stats()
+    db.session.commit()
+    print(f"✅ Rebuilt {topic_rows} student/topic totals and statistics for {questions} questions")
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Create (if needed) and refill the SQLite FTS5 question search index."""
+    rows = rebuild_search_index()
+    db.session.commit()
+    if rows is None:
+        print("ℹ️ Full-text search needs SQLite with FTS5; searches use LIKE filters instead")
+    else:
+        print(f"✅ Indexed {rows} questions")
+
+@app.cli.command('regrade')
+@click.option('--question', 'question_ids', type=int, multiple=True, help='Question id; repeat for several.')
+@click.option('--topic', help='Regrade every question in this topic.')
+@click.option('--dry-run', is_flag=True, help='Report the changes without writing them.')
+def regrade_command(question_ids, topic, dry_run):
+    """Re-apply the current answer keys to stored answers (whole bank by default)."""
+    report = regrade(question_ids or None, topic, dry_run=dry_run)
+    db.session.commit()
+    for q in report['questions']:
+        print(f"Question {q['question_id']}: +{q['to_correct']} correct, -{q['to_incorrect']} incorrect")
+    verb = 'Would change' if dry_run else 'Changed'
+    print(f"✅ {verb} {report['changed']} answers for {report['students']} students")
+    if report['changed'] and not dry_run:
+        shared_versions.bump('notifications')
+
+@app.cli.command('import-questions')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'json', 'jsonl']), help='Defaults to the file extension.')
+@click.option('--dry-run', is_flag=True, help='Validate and report without inserting.')
+@click.option('--batch-size', default=500, show_default=True)
+def import_questions_command(path, fmt, dry_run, batch_size):
+    """Bulk-import questions from a CSV, JSON or JSONL file."""
+    with open(path, 'rb') as stream:
+        report = import_questions(stream, fmt or detect_format(path), dry_run=dry_run, batch_size=batch_size)
+    if report['inserted']:
+        index_missing()
+        db.session.commit()
+        shared_versions.bump('questions')
+    for error in report['errors']:
+        print(f"Row {error['row']}: {'; '.join(error['errors'])}")
+    verb = 'Would insert' if dry_run else 'Inserted'
+    print(f"✅ {verb} {report['valid']} of {report['total']} rows "
+          f"({report['duplicates']} duplicates, {len(report['errors'])} rejected)")
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Precompress static assets (.gz, plus .br when brotli is installed)."""
+    written = static_assets.build_compressed_assets(app.static_folder)
+    print(f"✅ Wrote {written} precompressed asset variants")
+
+@app.cli.command('gc-files')
+@click.option('--grace-hours', default=1.0, show_default=True, help='Only remove files unreferenced for this long.')
+def gc_files_command(grace_hours):
+    """Delete stored uploads and question images that nothing references any more."""
+    grace = timedelta(hours=grace_hours)
+    removed = upload_store.collect_garbage(grace) + question_image_store.collect_garbage(grace)
+    print(f"✅ Removed {removed} unreferenced files")
+
+def maintenance_options(fn):
+    fn = click.option('--batch-size', type=int, default=lambda: app.config['MAINTENANCE_BATCH_SIZE'], show_default='config',
+                      help='Rows per transaction.')(fn)
+    return click.option('--pause-ms', type=int, default=lambda: app.config['MAINTENANCE_BATCH_PAUSE_MS'],
+                        show_default='config', help='Sleep between batches so the app can write.')(fn)
+
+@app.cli.command('purge-notifications')
+@click.option('--days', type=int, default=lambda: app.config['NOTIFICATION_RETENTION_DAYS'], show_default='config',
+              help='Delete read notifications older than this.')
+@maintenance_options
+def purge_notifications_command(days, batch_size, pause_ms):
+    """Delete old read notifications in small batches."""
+    removed = purge_notifications(days, batch_size, pause_ms / 1000, progress=print)
+    print(f"✅ Purged {removed} notifications read more than {days} days ago")
+
+@app.cli.command('archive-answers')
+@click.option('--days', type=int, default=lambda: app.config['ANSWER_ARCHIVE_DAYS'] or None, show_default='config',
+              help='Archive answers submitted longer ago than this.')
+@maintenance_options
+def archive_answers_command(days, batch_size, pause_ms):
+    """Move old answers into the answer_archive table in small batches."""
+    if not days:
+        raise click.UsageError('Pass --days or set ANSWER_ARCHIVE_DAYS')
+    moved = archive_answers(days, batch_size, pause_ms / 1000, progress=print)
+    print(f"✅ Archived {moved} answers submitted more than {days} days ago")
+
+@app.cli.command('check-orphans')
+@click.option('--fix', is_flag=True, help='Delete orphaned rows (notifications lose the dangling reference instead).')
+@maintenance_options
+def check_orphans_command(fix, batch_size, pause_ms):
+    """Find rows that reference a missing user or question."""
+    results = clean_orphans(batch_size, pause_ms / 1000, progress=print,
+                            release_files=upload_store.release) if fix else find_orphans()
+    for label, count in results:
+        if count:
+            print(f"{label}: {count}")
+    total = sum(count for _, count in results)
+    print(f"✅ {'Fixed' if fix else 'Found'} {total} orphaned rows")
+
+@app.cli.command('optimize-db')
+@click.option('--vacuum', is_flag=True, help='Also VACUUM; this blocks writers while it runs.')
+@click.option('--skip-integrity-check', is_flag=True)
+def optimize_db_command(vacuum, skip_integrity_check):
+    """Refresh planner statistics and check database integrity."""
+    problems = optimize_database(vacuum=vacuum, integrity_check=not skip_integrity_check, progress=print)
+    for problem in problems:
+        print(problem)
+    if problems:
+        raise SystemExit(1)
+    print("✅ Database optimized")
+
+@app.cli.command('maintenance')
+def maintenance_command():
+    """Run the scheduled maintenance pass once with the configured retention."""
+    report = run_maintenance(app.config, progress=print)
+    print(f"✅ Purged {report['notifications_purged']} notifications, archived {report['answers_archived']} answers")
+
 if __name__ == '__main__':
     from waitress import serve
     port = int(os.environ.get("PORT", 5000))
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+from sqlalchemy import exists
+from models import db, dialect_insert, Attempt
+
+
+def start_attempts(student_id, question_ids, now=None):
+    """Start the timer on each question unless it is already running; returns {question_id: start_time}.
+
+    One INSERT ... ON CONFLICT DO UPDATE ... RETURNING statement: new rows get
+    `now`, existing rows are left untouched (the no-op update makes RETURNING
+    report them too), so concurrent double starts can't hit the unique constraint.
+    The caller commits.
+    """
+    question_ids = sorted(set(question_ids))
+    if not question_ids:
+        return {}
+    now = now or datetime.utcnow()
+    stmt = dialect_insert(Attempt).values([
+        {'student_id': student_id, 'question_id': question_id, 'start_time': now}
+        for question_id in question_ids
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Attempt.student_id, Attempt.question_id],
+        set_={'start_time': Attempt.start_time},
+    ).returning(Attempt.question_id, Attempt.start_time)
+    return {row.question_id: row.start_time for row in db.session.execute(stmt)}
+
+
+def start_attempt(student_id, question_id, now=None):
+    return start_attempts(student_id, [question_id], now)[question_id]
+
+
+def expired_clause(student_id, question_id, time_limit, submitted_at, grace_seconds=0):
+    """SQL boolean: the student's timer on a timed question ran out before submitted_at.
+
+    Meant to be assigned to Answer.is_expired so the check runs inside the
+    answer INSERT; untimed questions and questions never started are not expired.
+    """
+    if not time_limit:
+        return False
+    deadline = submitted_at - timedelta(minutes=time_limit, seconds=grace_seconds)
+    return exists().where(
+        Attempt.student_id == student_id,
+        Attempt.question_id == question_id,
+        Attempt.start_time < deadline,
+    )
@@ -0,0 +1,129 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from models import db
+
+
+class BatchWriter:
+    """Group-commit pipeline: one background thread applies queued jobs and
+    commits them together, every max_delay seconds or every max_batch jobs.
+
+    handler(job) stages a job on db.session without committing and returns the
+    job's result; on_commit(results) runs once the batch is durable. Callers
+    block on the returned Future, so a response is only sent after its row has
+    been committed.
+    """
+
+    def __init__(self, app, handler, on_commit=None, max_batch=100, max_delay=0.005):
+        self.app = app
+        self.handler = handler
+        self.on_commit = on_commit
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+
+    def _ensure_started(self):
+        # Started lazily (and again after a fork) so a preloading parent process
+        # never owns the writer thread.
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='batch-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, job):
+        """Queue a job; returns a Future, or None once the writer is shutting down."""
+        if self._stopping:
+            return None
+        self._ensure_started()
+        future = Future()
+        self._queue.put((job, future))
+        return future
+
+    def stop(self, timeout=30):
+        """Flush everything already queued, then stop the thread."""
+        self._stopping = True
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid() and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None, True
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        while True:
+            batch, stop = self._collect()
+            if batch:
+                with self.app.app_context():
+                    self._write(batch)
+            if stop:
+                # Drain anything that raced in behind the stop marker
+                leftovers = []
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not None:
+                        leftovers.append(item)
+                if leftovers:
+                    with self.app.app_context():
+                        self._write(leftovers)
+                return
+
+    def _write(self, batch):
+        try:
+            results = [self.handler(job) for job, _ in batch]
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            logging.exception("Batched write failed, retrying %d jobs one at a time", len(batch))
+            for item in batch:
+                self._write_one(*item)
+            return
+        finally:
+            db.session.remove()
+        self._settle(batch, results)
+
+    def _write_one(self, job, future):
+        try:
+            result = self.handler(job)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            future.set_exception(e)
+            return
+        self._settle([(job, future)], [result])
+
+    def _settle(self, batch, results):
+        if self.on_commit:
+            try:
+                self.on_commit(results)
+            except Exception:
+                logging.exception("Batch writer on_commit hook failed")
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
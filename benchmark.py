@@ -0,0 +1,213 @@
+"""Classroom load test: seeds a throwaway database and drives the real routes concurrently.
+
+    python benchmark.py --students 200 --questions 100 --concurrency 20 --output bench.json
+    python benchmark.py --compare bench.json   # fail if p95 regressed against a saved run
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.queries = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.local = threading.local()
+
+    def on_query(self, *args):
+        route = getattr(self.local, 'route', None)
+        if route:
+            self.local.query_count += 1
+
+    def call(self, route, fn):
+        self.local.route = route
+        self.local.query_count = 0
+        start = time.perf_counter()
+        response = fn()
+        response.get_data()  # drain streamed bodies inside the timed window
+        response.close()
+        elapsed = (time.perf_counter() - start) * 1000
+        self.local.route = None
+        with self.lock:
+            self.samples[route].append(elapsed)
+            self.queries[route] += self.local.query_count
+            if response.status_code >= 400:
+                self.errors[route] += 1
+        return response
+
+    def report(self, wall_seconds):
+        routes = {}
+        for route, values in sorted(self.samples.items()):
+            values.sort()
+            routes[route] = {
+                'requests': len(values),
+                'errors': self.errors[route],
+                'p50_ms': round(percentile(values, 50), 2),
+                'p95_ms': round(percentile(values, 95), 2),
+                'p99_ms': round(percentile(values, 99), 2),
+                'mean_ms': round(sum(values) / len(values), 2),
+                'throughput_rps': round(len(values) / wall_seconds, 2),
+                'queries_per_request': round(self.queries[route] / len(values), 2),
+            }
+        total = sum(r['requests'] for r in routes.values())
+        return {'wall_seconds': round(wall_seconds, 3), 'total_requests': total,
+                'throughput_rps': round(total / wall_seconds, 2), 'routes': routes}
+
+
+def seed(app, db, students, questions):
+    from sqlalchemy import insert
+    from werkzeug.security import generate_password_hash
+    from models import User, Question, Classroom
+    with app.app_context():
+        db.create_all()
+        # One shared hash keeps seeding fast while logins still pay the real verify cost
+        password = generate_password_hash('benchpass')
+        db.session.add(Classroom(active_meet_link='https://meet.google.com/', is_live=False))
+        db.session.execute(insert(User), [{'username': 'bench_admin', 'full_name': 'Bench Admin',
+                                           'password': password, 'role': 'admin'}] +
+                           [{'username': f'student{i}', 'full_name': f'Student {i}',
+                             'password': password, 'role': 'student'} for i in range(students)])
+        db.session.execute(insert(Question), [{
+            'text': f'Benchmark question {i}: what is {i} + {i}?', 'topic': random.choice(['Quant', 'Logic', 'Verbal']),
+            'option_a': str(2 * i), 'option_b': str(2 * i + 1), 'option_c': str(i), 'option_d': str(i * i),
+            'correct_answer': 'A', 'explanation': 'Add the two numbers.', 'time_limit': 10,
+        } for i in range(questions)])
+        db.session.commit()
+        return [qid for (qid,) in db.session.query(Question.id)]
+
+
+def student_session(app, recorder, index, question_ids, answers_each):
+    client = app.test_client()
+    recorder.call('/login', lambda: client.post('/login', data={'username': f'student{index}', 'password': 'benchpass'}))
+    recorder.call('/student/dashboard', lambda: client.get('/student/dashboard'))
+    for qid in random.sample(question_ids, min(answers_each, len(question_ids))):
+        recorder.call('/student/start_attempt', lambda: client.post('/student/start_attempt', json={'question_id': qid}))
+        recorder.call('/submit_answer', lambda: client.post('/submit_answer', data={
+            'question_id': qid, 'selected_option': random.choice('ABCD')}))
+    recorder.call('/student/dashboard', lambda: client.get('/student/dashboard'))
+
+
+def admin_session(app, recorder, stop, interval):
+    client = app.test_client()
+    recorder.call('/login', lambda: client.post('/login', data={'username': 'bench_admin', 'password': 'benchpass'}))
+    while not stop.is_set():
+        recorder.call('/admin/notifications', lambda: client.get('/admin/notifications'))
+        recorder.call('/admin/submissions', lambda: client.get('/admin/submissions'))
+        stop.wait(interval)
+    recorder.call('/admin/export-submissions', lambda: client.get('/admin/export-submissions'))
+    recorder.call('/admin/export-members', lambda: client.get('/admin/export-members'))
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix='aptitude-bench-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    os.environ.setdefault('PORT', '5000')
+    # Keep the generated secret and version stamps out of the repository's instance/ folder
+    os.environ['INSTANCE_PATH'] = os.path.join(workdir, 'instance')
+    # app.py writes its log file and upload folders relative to the working directory
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+    import logging
+    from sqlalchemy import event
+    from app import app, db
+    logging.getLogger().setLevel(logging.WARNING)
+
+    random.seed(args.seed)
+    question_ids = seed(app, db, args.students, args.questions)
+    recorder = Recorder()
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', recorder.on_query)
+
+    stop = threading.Event()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency + args.admins) as pool:
+        admins = [pool.submit(admin_session, app, recorder, stop, args.admin_interval) for _ in range(args.admins)]
+        students = [pool.submit(student_session, app, recorder, i, question_ids, args.answers)
+                    for i in range(args.students)]
+        for future in students:
+            future.result()
+        stop.set()
+        for future in admins:
+            future.result()
+    wall = time.perf_counter() - start
+
+    result = recorder.report(wall)
+    result['config'] = {k: v for k, v in vars(args).items() if k not in ('output', 'compare')}
+    result['created_at'] = datetime.utcnow().isoformat()
+    result['workdir'] = workdir
+    return result
+
+
+def print_report(result):
+    print(f"{'route':32} {'reqs':>6} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>8} {'sql/req':>8}")
+    for route, r in result['routes'].items():
+        print(f"{route:32} {r['requests']:>6} {r['errors']:>4} {r['p50_ms']:>8} {r['p95_ms']:>8} "
+              f"{r['p99_ms']:>8} {r['throughput_rps']:>8} {r['queries_per_request']:>8}")
+    print(f"\n{result['total_requests']} requests in {result['wall_seconds']}s ({result['throughput_rps']} req/s)")
+
+
+def compare(result, baseline, tolerance):
+    regressions = []
+    for route, r in result['routes'].items():
+        before = baseline.get('routes', {}).get(route)
+        if not before:
+            continue
+        for metric in ('p95_ms', 'queries_per_request'):
+            old, new = before[metric], r[metric]
+            change = (new - old) / old * 100 if old else 0
+            flag = ' <-- regression' if change > tolerance else ''
+            print(f"{route:32} {metric:20} {old:>9} -> {new:>9} ({change:+.1f}%){flag}")
+            if flag:
+                regressions.append((route, metric))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=50)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--answers', type=int, default=5, help='questions each student answers')
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--admins', type=int, default=1)
+    parser.add_argument('--admin-interval', type=float, default=0.5, help='seconds between admin polls')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write results as JSON to this path')
+    parser.add_argument('--compare', help='baseline JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=20.0, help='allowed regression in percent')
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = json.load(open(args.compare)) if args.compare else None
+    result = run(args)
+    print_report(result)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"Saved results to {output}")
+    if baseline:
+        print()
+        if compare(result, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,13 @@
-from app import app, db, User, Question, Answer
+from app import app
+from maintenance import find_orphans, optimize_database
+
+# Orphan counts via anti-joins, then integrity_check (plus a quick ANALYZE).
+# `flask --app app check-orphans --fix` repairs what it reports.
 with app.app_context():
-    answers = Answer.query.all()
-    orphans = []
-    for a in answers:
-        if not a.student:
-            orphans.append(f"Answer {a.id} has no student")
-        if not a.question:
-            orphans.append(f"Answer {a.id} has no question")
-    if orphans:
-        print("\n".join(orphans))
-    else:
+    orphans = [(label, count) for label, count in find_orphans() if count]
+    for label, count in orphans:
+        print(f"{label}: {count}")
+    if not orphans:
         print("No orphaned records found.")
+    problems = optimize_database(progress=print)
+    print("\n".join(problems) if problems else "Integrity check passed.")
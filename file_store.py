@@ -0,0 +1,130 @@
+import hashlib
+import os
+import re
+import tempfile
+from datetime import datetime, timedelta
+from sqlalchemy import case
+from models import db, dialect_insert, StoredFile
+
+CHUNK_SIZE = 64 * 1024
+HASHED_KEY = re.compile(r'^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.[a-z0-9]+)?$')
+
+
+def is_content_key(key):
+    return bool(key and HASHED_KEY.match(key))
+
+
+class ContentStore:
+    """Content-addressed file storage: files are named by their SHA-256 and
+    sharded two levels deep (ab/cd/abcd....ext), so identical uploads share one
+    file and a name never points at different bytes.
+
+    Reference counts live in the stored_files table; release() only decrements,
+    and collect_garbage() removes unreferenced files after a grace period so a
+    concurrent upload of the same content cannot lose its file.
+    """
+
+    def __init__(self, name, root):
+        self.name = name
+        self.root = root
+
+    def path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def write(self, file_storage, extension):
+        """Stream an upload to disk in chunks; returns (key, size).
+
+        The file's stored_files row is created (or its updated_at bumped) in a
+        short transaction of its own, so collect_garbage() leaves the file alone
+        for a full grace period even if the caller never takes a reference.
+        """
+        tmp_dir = os.path.join(self.root, '.tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    chunk = file_storage.stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    size += len(chunk)
+                    out.write(chunk)
+            hexdigest = digest.hexdigest()
+            ext = f".{extension.lower()}" if extension else ''
+            key = f"{hexdigest[:2]}/{hexdigest[2:4]}/{hexdigest}{ext}"
+            target = self.path(key)
+            # Touch before looking for an existing copy: collect_garbage() re-checks the row before deleting
+            self._touch(key, size)
+            if os.path.exists(target):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return key, size
+
+    def _touch(self, key, size):
+        if not is_content_key(key):
+            return
+        now = datetime.utcnow()
+        with db.engine.begin() as conn:
+            conn.execute(dialect_insert(StoredFile).values(
+                store=self.name, key=key, size=size, refcount=0, updated_at=now,
+            ).on_conflict_do_update(
+                index_elements=[StoredFile.store, StoredFile.key],
+                set_={'updated_at': now},
+            ))
+
+    def save(self, file_storage, extension):
+        """write() plus a reference taken in the caller's transaction; returns the key."""
+        key, size = self.write(file_storage, extension)
+        self.retain(key, size)
+        return key
+
+    def retain(self, key, size=None):
+        if not is_content_key(key):
+            return
+        now = datetime.utcnow()
+        updated = db.session.query(StoredFile).filter_by(store=self.name, key=key).update(
+            {StoredFile.refcount: StoredFile.refcount + 1, StoredFile.updated_at: now}, synchronize_session=False)
+        if not updated:
+            db.session.add(StoredFile(store=self.name, key=key, size=size, refcount=1, updated_at=now))
+
+    def release(self, keys):
+        """Drop one reference per key (legacy, non-hashed names are ignored)."""
+        for key in filter(is_content_key, keys):
+            db.session.query(StoredFile).filter_by(store=self.name, key=key).update({
+                StoredFile.refcount: case((StoredFile.refcount > 0, StoredFile.refcount - 1), else_=0),
+                StoredFile.updated_at: datetime.utcnow(),
+            }, synchronize_session=False)
+
+    def collect_garbage(self, grace=timedelta(hours=1)):
+        """Delete files whose reference count has been zero for longer than grace."""
+        cutoff = datetime.utcnow() - grace
+        removed = 0
+        candidates = db.session.query(StoredFile.key).filter(
+            StoredFile.store == self.name, StoredFile.refcount <= 0, StoredFile.updated_at < cutoff).all()
+        for (key,) in candidates:
+            deleted = db.session.query(StoredFile).filter(
+                StoredFile.store == self.name, StoredFile.key == key, StoredFile.refcount <= 0,
+                StoredFile.updated_at < cutoff,  # re-checked: a concurrent write() may have just touched it
+            ).delete(synchronize_session=False)
+            db.session.commit()
+            path = self.path(key)
+            if deleted and os.path.exists(path):
+                # Move it aside, then look again: a write() that touched the key meanwhile gets it back
+                trash = path + '.gc'
+                os.replace(path, trash)
+                if db.session.query(StoredFile.key).filter_by(store=self.name, key=key).first():
+                    os.replace(trash, path)
+                else:
+                    os.remove(trash)
+                    removed += 1
+                db.session.commit()
+        return removed
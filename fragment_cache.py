@@ -0,0 +1,44 @@
+import threading
+from collections import OrderedDict
+from flask import get_template_attribute
+from markupsafe import Markup
+
+
+class FragmentCache:
+    """Bounded LRU of rendered question-card fragments.
+
+    Entries are keyed by the immutable question snapshot itself, so an edited
+    question can never hit a stale fragment; invalidate() just frees memory early.
+    """
+
+    def __init__(self, template='_question_card.html', max_entries=4096):
+        self.template = template
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, name, question, *args):
+        key = (question.id, name, args, question)
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+        html = Markup(get_template_attribute(self.template, name)(question, *args))
+        with self._lock:
+            self._entries[key] = html
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return html
+
+    def invalidate(self, question_id=None):
+        with self._lock:
+            if question_id is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[0] == question_id]:
+                del self._entries[key]
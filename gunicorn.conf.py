@@ -0,0 +1,34 @@
+# Gunicorn settings for running the app on several cores: gunicorn -c gunicorn.conf.py app:app
+import multiprocessing
+import os
+
+cpus = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+# Threaded workers so long-lived notification streams don't pin a whole process
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', min(2 * cpus + 1, 8)))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+
+# Import the app once in the master, then fork workers. Everything process-local
+# (log listener, batch writer thread, hashing pool) is started lazily or re-started
+# after the fork; database connections are dropped below so no socket is shared.
+preload_app = True
+
+# Streams hold a thread for their whole lifetime; keep half of each worker's threads for requests
+os.environ.setdefault('NOTIFICATION_STREAM_LIMIT', str(max(1, threads // 2)))
+
+# Each worker is already its own process; one hashing process per worker is plenty
+os.environ.setdefault('PASSWORD_HASH_WORKERS', '1')
+
+accesslog = None
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    from app import app, db
+    with app.app_context():
+        db.engine.dispose(close=False)
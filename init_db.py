@@ -1,11 +1,14 @@
 from app import app, db, User, Classroom
 from werkzeug.security import generate_password_hash
 from datetime import datetime
+from search import rebuild_search_index
 
 def init_db():
     with app.app_context():
         print("🚀 Initializing database (SQL)...")
         db.create_all()
+        rebuild_search_index()
+        db.session.commit()
         
         # Initialize Classroom row if missing
         if not Classroom.query.first():
@@ -22,7 +25,7 @@ def init_db():
             admin = User(
                 username='admin',
                 full_name='Administrator',
-                password=generate_password_hash('admin123'),
+                password=generate_password_hash('admin123', method=app.config['PASSWORD_HASH_METHOD']),
                 role='admin',
                 created_at=datetime.utcnow()
             )
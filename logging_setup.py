@@ -0,0 +1,32 @@
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = '%(asctime)s %(levelname)s: %(message)s'
+
+
+def configure_logging(log_file='error.log', level=logging.INFO):
+    """Route all logging through a queue so request threads never wait on disk or stdout.
+
+    The file and console handlers run on a single background listener thread,
+    which is flushed and stopped at interpreter exit and restarted in forked
+    children (e.g. gunicorn workers of a preloaded app).
+    """
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.FileHandler(log_file), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    listener.start()
+    os.register_at_fork(after_in_child=listener.start)
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,240 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import exists, func
+from models import db, ANSWER_COLUMNS, ARCHIVE_COLUMNS, Answer, AnswerArchive, Attempt, Notification, Question, QuestionStats, \
+    QuestionTimeBucket, StudentStats, TopicStats, User
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, every process runs its own schedule
+    fcntl = None
+
+
+def _quiet(message):
+    pass
+
+
+# --- Batched retention ---
+def _in_batches(select_ids, apply, batch_size, pause, progress, label):
+    """Run apply(ids) on successive batches from select_ids, committing after each
+    one so no write lock is held for longer than a single batch."""
+    total = 0
+    while True:
+        ids = [row_id for (row_id,) in db.session.execute(select_ids.limit(batch_size))]
+        if not ids:
+            break
+        apply(ids)
+        db.session.commit()
+        total += len(ids)
+        progress(f"{label}: {total}")
+        if len(ids) < batch_size:
+            break
+        time.sleep(pause)
+    return total
+
+
+def purge_notifications(days, batch_size=500, pause=0.05, progress=_quiet):
+    """Delete read notifications older than days; returns the number removed."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    select = db.select(Notification.id).where(Notification.read.is_(True), Notification.created_at < cutoff)
+    return _in_batches(select, lambda ids: db.session.execute(
+        db.delete(Notification).where(Notification.id.in_(ids)).execution_options(synchronize_session=False)
+    ), batch_size, pause, progress, 'notifications purged')
+
+
+def mark_all_notifications_read(batch_size=500):
+    select = db.select(Notification.id).where(Notification.read.is_(False))
+    return _in_batches(select, lambda ids: db.session.execute(
+        db.update(Notification).where(Notification.id.in_(ids)).values(read=True)
+        .execution_options(synchronize_session=False)
+    ), batch_size, 0, _quiet, 'notifications marked read')
+
+
+def archive_answers(days, batch_size=500, pause=0.05, progress=_quiet):
+    """Move answers submitted more than days ago into answer_archive; returns the number moved.
+
+    Archived answers still count in the statistics rebuilds and regrades and
+    still mark the question as answered on the student dashboard, but leave
+    the submissions views and exports.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    columns = [getattr(Answer, name) for name in ANSWER_COLUMNS]
+
+    def move(ids):
+        db.session.execute(db.insert(AnswerArchive).from_select(
+            list(ARCHIVE_COLUMNS), db.select(*columns).where(Answer.id.in_(ids))))
+        db.session.execute(db.delete(Answer).where(Answer.id.in_(ids)).execution_options(synchronize_session=False))
+
+    select = db.select(Answer.id).where(Answer.submitted_at < cutoff)
+    return _in_batches(select, move, batch_size, pause, progress, 'answers archived')
+
+
+# --- Orphans ---
+# (label, referencing column, referenced column, fix): 'delete' drops the row, 'detach' clears the reference
+ORPHAN_CHECKS = (
+    ('answers without a student', Answer.student_id, User.id, 'delete'),
+    ('answers without a question', Answer.question_id, Question.id, 'delete'),
+    ('archived answers without a student', AnswerArchive.student_id, User.id, 'delete'),
+    ('archived answers without a question', AnswerArchive.question_id, Question.id, 'delete'),
+    ('attempts without a student', Attempt.student_id, User.id, 'delete'),
+    ('attempts without a question', Attempt.question_id, Question.id, 'delete'),
+    ('student stats without a student', StudentStats.student_id, User.id, 'delete'),
+    ('topic stats without a student', TopicStats.student_id, User.id, 'delete'),
+    ('question stats without a question', QuestionStats.question_id, Question.id, 'delete'),
+    ('answer-time buckets without a question', QuestionTimeBucket.question_id, Question.id, 'delete'),
+    ('notifications for a deleted student', Notification.student_id, User.id, 'detach'),
+    ('notifications for a deleted question', Notification.question_id, Question.id, 'detach'),
+)
+
+
+def _orphaned(column, parent):
+    # Anti-join: a reference that is set but matches no parent row
+    return column.is_not(None), ~exists().where(parent == column)
+
+
+def find_orphans():
+    """[(label, count)] for every check in ORPHAN_CHECKS, one COUNT query each."""
+    return [(label, db.session.execute(
+        db.select(func.count()).select_from(column.class_).where(*_orphaned(column, parent))).scalar())
+        for label, column, parent, _ in ORPHAN_CHECKS]
+
+
+def _fix_orphans(model, column, fix, criteria):
+    stmt = db.update(model).values({column.key: None}) if fix == 'detach' else db.delete(model)
+    return db.session.execute(stmt.where(*criteria).execution_options(synchronize_session=False)).rowcount
+
+
+def clean_orphans(batch_size=500, pause=0.05, progress=_quiet, release_files=None):
+    """Delete or detach every orphan; returns [(label, rows fixed)].
+
+    release_files(keys) is called with the uploads of each batch of deleted
+    answers, in the same transaction as the delete, so their files can be collected.
+    """
+    fixed = []
+    for label, column, parent, fix in ORPHAN_CHECKS:
+        model, criteria = column.class_, _orphaned(column, parent)
+        if hasattr(model, 'id'):
+            def apply(ids):
+                if release_files and fix == 'delete' and hasattr(model, 'file_path'):
+                    release_files([key for (key,) in db.session.execute(
+                        db.select(model.file_path).where(model.id.in_(ids), model.file_path.is_not(None)))])
+                _fix_orphans(model, column, fix, [model.id.in_(ids)])
+
+            count = _in_batches(db.select(model.id).where(*criteria), apply, batch_size, pause, progress, label)
+        else:
+            # Summary tables have one row per student/topic/question and no surrogate id
+            count = _fix_orphans(model, column, fix, criteria)
+            db.session.commit()
+        fixed.append((label, count))
+    return fixed
+
+
+# --- Database upkeep ---
+def _timed(progress, label, fn):
+    started = time.perf_counter()
+    progress(f"{label}...")
+    result = fn()
+    progress(f"{label} done in {time.perf_counter() - started:.1f}s")
+    return result
+
+
+def optimize_database(vacuum=False, integrity_check=True, progress=_quiet):
+    """Refresh planner statistics, optionally check integrity and VACUUM.
+
+    Returns the integrity problems found (empty when the check passed or was
+    skipped). VACUUM rewrites the whole file and blocks writers while it runs,
+    so it only happens when asked for.
+    """
+    db.session.commit()
+    engine = db.engine
+    problems = []
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        if engine.dialect.name == 'sqlite':
+            if integrity_check:
+                rows = _timed(progress, 'integrity_check',
+                              lambda: [row for (row,) in conn.exec_driver_sql('PRAGMA integrity_check')])
+                problems = [] if rows == ['ok'] else rows
+            # A bounded sample per index keeps ANALYZE short on large tables
+            conn.exec_driver_sql('PRAGMA analysis_limit=1000')
+            _timed(progress, 'ANALYZE', lambda: conn.exec_driver_sql('ANALYZE'))
+            if vacuum:
+                _timed(progress, 'VACUUM', lambda: conn.exec_driver_sql('VACUUM'))
+                conn.exec_driver_sql('PRAGMA wal_checkpoint(TRUNCATE)')
+        else:
+            _timed(progress, 'VACUUM ANALYZE' if vacuum else 'ANALYZE',
+                   lambda: conn.exec_driver_sql('VACUUM ANALYZE' if vacuum else 'ANALYZE'))
+            if integrity_check:
+                progress(f"integrity_check is not available on {engine.dialect.name}, skipped")
+    return problems
+
+
+def run_maintenance(config, progress=_quiet):
+    """One scheduled pass: retention by the configured ages, then ANALYZE; returns row counts."""
+    batch = {'batch_size': config['MAINTENANCE_BATCH_SIZE'], 'pause': config['MAINTENANCE_BATCH_PAUSE_MS'] / 1000,
+             'progress': progress}
+    report = {'notifications_purged': 0, 'answers_archived': 0}
+    if config['NOTIFICATION_RETENTION_DAYS']:
+        report['notifications_purged'] = purge_notifications(config['NOTIFICATION_RETENTION_DAYS'], **batch)
+    if config['ANSWER_ARCHIVE_DAYS']:
+        report['answers_archived'] = archive_answers(config['ANSWER_ARCHIVE_DAYS'], **batch)
+    optimize_database(integrity_check=False, progress=progress)
+    return report
+
+
+class MaintenanceScheduler:
+    """Runs run_maintenance every interval seconds on a background thread.
+
+    Started lazily (and again after a fork) like BatchWriter. With several
+    worker processes only the one holding an flock on lock_path does the work;
+    another takes over if that process exits. interval=0 disables it.
+    """
+
+    def __init__(self, app, interval, lock_path):
+        self.app = app
+        self.interval = interval
+        self.lock_path = lock_path
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock_file = None
+
+    def ensure_started(self):
+        if not self.interval or (self._thread is not None and self._pid == os.getpid()):
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._lock_file = None
+                self._thread = threading.Thread(target=self._run, name='maintenance', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _acquire(self):
+        if fcntl is None:
+            return True
+        if self._lock_file is None:
+            os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+            self._lock_file = open(self.lock_path, 'a')
+        try:
+            # Kept until the process exits; re-acquiring a held flock is a no-op
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            if not self._acquire():
+                continue
+            try:
+                with self.app.app_context():
+                    report = run_maintenance(self.app.config)
+                logging.info(f"Scheduled maintenance: {report}")
+            except Exception:
+                logging.exception("Scheduled maintenance failed")
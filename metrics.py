@@ -0,0 +1,92 @@
+import threading
+from collections import defaultdict
+
+# Upper bounds in seconds, Prometheus-style cumulative buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.total += seconds
+        self.count += 1
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RequestMetrics:
+    """Per-endpoint latency histograms, status counters and an in-flight gauge."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency = defaultdict(_Histogram)
+        self._statuses = defaultdict(int)
+        self._in_flight = 0
+
+    def request_started(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def request_finished(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def observe(self, endpoint, method, status, seconds):
+        with self._lock:
+            self._latency[(endpoint, method)].observe(seconds)
+            self._statuses[(endpoint, method, status)] += 1
+
+    def render(self):
+        """Prometheus text exposition format."""
+        with self._lock:
+            latency = {key: (list(h.counts), h.total, h.count) for key, h in self._latency.items()}
+            statuses = dict(self._statuses)
+            in_flight = self._in_flight
+        lines = [
+            '# HELP http_requests_in_flight Requests currently being handled by this process.',
+            '# TYPE http_requests_in_flight gauge',
+            f'http_requests_in_flight {in_flight}',
+            '# HELP http_requests_total Completed requests by endpoint, method and status.',
+            '# TYPE http_requests_total counter',
+        ]
+        for (endpoint, method, status), count in sorted(statuses.items()):
+            lines.append(f'http_requests_total{{endpoint="{_label(endpoint)}",method="{method}",status="{status}"}} {count}')
+        lines += [
+            '# HELP http_request_duration_seconds Request latency by endpoint and method.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for (endpoint, method), (counts, total, count) in sorted(latency.items()):
+            labels = f'endpoint="{_label(endpoint)}",method="{method}"'
+            cumulative = 0
+            for bound, bucket in zip(LATENCY_BUCKETS, counts):
+                cumulative += bucket
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels}}} {total:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def render_cache_counters(caches):
+    """Hit/miss counters for in-process caches exposing .hits and .misses."""
+    lines = []
+    for kind in ('hits', 'misses'):
+        lines += [
+            f'# HELP cache_{kind}_total Lookups answered {"from" if kind == "hits" else "outside"} the named in-process cache.',
+            f'# TYPE cache_{kind}_total counter',
+        ]
+        for name, cache in sorted(caches.items()):
+            lines.append(f'cache_{kind}_total{{cache="{_label(name)}"}} {getattr(cache, kind)}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,51 @@
+"""hot path indexes and student_stats
+
+Revision ID: 3f2a9c1d7b10
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# The schema predates migrations and is created by init_db.py (db.create_all),
+# which already builds everything below on a fresh database. Each step is
+# therefore skipped when the object exists.
+INDEXES = [
+    ('ix_answers_student_id', 'answers', ['student_id']),
+    ('ix_answers_submitted_at', 'answers', ['submitted_at']),
+    ('ix_answers_question_id', 'answers', ['question_id']),
+    ('ix_notifications_read_created_at', 'notifications', ['read', 'created_at']),
+    ('ix_questions_created_at', 'questions', ['created_at']),
+    ('ix_users_role', 'users', ['role']),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('student_stats'):
+        op.create_table(
+            'student_stats',
+            sa.Column('student_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+            sa.Column('solved', sa.Integer(), nullable=False),
+            sa.Column('correct', sa.Integer(), nullable=False),
+            sa.Column('today_date', sa.Date(), nullable=True),
+            sa.Column('today_solved', sa.Integer(), nullable=False),
+        )
+    for name, table, columns in INDEXES:
+        existing = {index['name'] for index in inspector.get_indexes(table)}
+        if name not in existing:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    op.drop_table('student_stats')
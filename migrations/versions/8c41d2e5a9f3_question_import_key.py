@@ -0,0 +1,30 @@
+"""question import key
+
+Revision ID: 8c41d2e5a9f3
+Revises: 3f2a9c1d7b10
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c41d2e5a9f3'
+down_revision = '3f2a9c1d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'import_key' not in {column['name'] for column in inspector.get_columns('questions')}:
+        op.add_column('questions', sa.Column('import_key', sa.String(length=64), nullable=True))
+    if 'ix_questions_import_key' not in {index['name'] for index in inspector.get_indexes('questions')}:
+        op.create_index('ix_questions_import_key', 'questions', ['import_key'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_questions_import_key', table_name='questions')
+    with op.batch_alter_table('questions') as batch_op:
+        batch_op.drop_column('import_key')
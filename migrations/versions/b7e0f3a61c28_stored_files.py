@@ -0,0 +1,32 @@
+"""stored files
+
+Revision ID: b7e0f3a61c28
+Revises: 8c41d2e5a9f3
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e0f3a61c28'
+down_revision = '8c41d2e5a9f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not sa.inspect(op.get_bind()).has_table('stored_files'):
+        op.create_table(
+            'stored_files',
+            sa.Column('store', sa.String(length=20), primary_key=True),
+            sa.Column('key', sa.String(length=255), primary_key=True),
+            sa.Column('size', sa.Integer(), nullable=True),
+            sa.Column('refcount', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+
+
+def downgrade():
+    op.drop_table('stored_files')
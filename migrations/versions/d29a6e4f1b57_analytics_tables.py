@@ -0,0 +1,55 @@
+"""leaderboard and question analytics tables
+
+Revision ID: d29a6e4f1b57
+Revises: b7e0f3a61c28
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd29a6e4f1b57'
+down_revision = 'b7e0f3a61c28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('topic_stats'):
+        op.create_table(
+            'topic_stats',
+            sa.Column('student_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+            sa.Column('topic', sa.String(length=100), primary_key=True),
+            sa.Column('solved', sa.Integer(), nullable=False),
+            sa.Column('correct', sa.Integer(), nullable=False),
+        )
+        op.create_index('ix_topic_stats_topic_correct', 'topic_stats', ['topic', 'correct'])
+    if not inspector.has_table('question_stats'):
+        op.create_table(
+            'question_stats',
+            sa.Column('question_id', sa.Integer(), sa.ForeignKey('questions.id'), primary_key=True),
+            sa.Column('answers', sa.Integer(), nullable=False),
+            sa.Column('correct', sa.Integer(), nullable=False),
+            sa.Column('option_a', sa.Integer(), nullable=False),
+            sa.Column('option_b', sa.Integer(), nullable=False),
+            sa.Column('option_c', sa.Integer(), nullable=False),
+            sa.Column('option_d', sa.Integer(), nullable=False),
+            sa.Column('option_other', sa.Integer(), nullable=False),
+        )
+    if not inspector.has_table('question_time_buckets'):
+        op.create_table(
+            'question_time_buckets',
+            sa.Column('question_id', sa.Integer(), sa.ForeignKey('questions.id'), primary_key=True),
+            sa.Column('bucket', sa.Integer(), primary_key=True),
+            sa.Column('count', sa.Integer(), nullable=False),
+        )
+
+
+def downgrade():
+    op.drop_table('question_time_buckets')
+    op.drop_table('question_stats')
+    op.drop_index('ix_topic_stats_topic_correct', table_name='topic_stats')
+    op.drop_table('topic_stats')
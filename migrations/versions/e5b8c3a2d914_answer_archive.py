@@ -0,0 +1,39 @@
+"""answer archive table
+
+Revision ID: e5b8c3a2d914
+Revises: d29a6e4f1b57
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b8c3a2d914'
+down_revision = 'd29a6e4f1b57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('answer_archive'):
+        op.create_table(
+            'answer_archive',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('answer_id', sa.Integer(), nullable=False),
+            sa.Column('student_id', sa.Integer(), nullable=False),
+            sa.Column('question_id', sa.Integer(), nullable=False),
+            sa.Column('selected_option', sa.String(length=10)),
+            sa.Column('file_path', sa.String(length=255)),
+            sa.Column('is_correct', sa.Boolean()),
+            sa.Column('is_expired', sa.Boolean()),
+            sa.Column('submitted_at', sa.DateTime()),
+        )
+        op.create_index('ix_answer_archive_student_question', 'answer_archive', ['student_id', 'question_id'])
+
+
+def downgrade():
+    op.drop_index('ix_answer_archive_student_question', table_name='answer_archive')
+    op.drop_table('answer_archive')
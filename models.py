@@ -1,21 +1,29 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy.dialects import postgresql, sqlite
 from datetime import datetime
 
 db = SQLAlchemy()
 
+_DIALECT_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+def dialect_insert(model):
+    # INSERT construct with on_conflict_do_update() for the bound database
+    return _DIALECT_INSERTS[db.session.get_bind().dialect.name](model)
+
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     full_name = db.Column(db.String(120))
     password = db.Column(db.String(255), nullable=False)
-    role = db.Column(db.String(20), default='student')
+    role = db.Column(db.String(20), default='student', index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Relationships
     answers = db.relationship('Answer', backref='student', lazy=True, cascade="all, delete-orphan")
     attempts = db.relationship('Attempt', backref='student', lazy=True, cascade="all, delete-orphan")
+    stats = db.relationship('StudentStats', uselist=False, lazy=True, cascade="all, delete-orphan")
 
 class Question(db.Model):
     __tablename__ = 'questions'
@@ -31,7 +39,8 @@ class Question(db.Model):
     meet_link = db.Column(db.String(255))
     time_limit = db.Column(db.Integer, default=10)
     image_file = db.Column(db.String(255))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    import_key = db.Column(db.String(64), unique=True, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     # Relationships
     answers = db.relationship('Answer', backref='question', lazy=True, cascade="all, delete-orphan")
@@ -40,13 +49,39 @@ class Question(db.Model):
 class Answer(db.Model):
     __tablename__ = 'answers'
     id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), nullable=False, index=True)
     selected_option = db.Column(db.String(10))
     file_path = db.Column(db.String(255))
     is_correct = db.Column(db.Boolean)
     is_expired = db.Column(db.Boolean, default=False)
-    submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    submitted_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class AnswerArchive(db.Model):
+    # Answers moved out of the live table by the archive-answers maintenance task (see maintenance.py).
+    # Live answer ids can be reused once archived, so the original id is kept in a plain column.
+    __tablename__ = 'answer_archive'
+    id = db.Column(db.Integer, primary_key=True)
+    answer_id = db.Column(db.Integer, nullable=False)
+    student_id = db.Column(db.Integer, nullable=False)
+    question_id = db.Column(db.Integer, nullable=False)
+    selected_option = db.Column(db.String(10))
+    file_path = db.Column(db.String(255))
+    is_correct = db.Column(db.Boolean)
+    is_expired = db.Column(db.Boolean)
+    submitted_at = db.Column(db.DateTime)
+    __table_args__ = (db.Index('ix_answer_archive_student_question', 'student_id', 'question_id'),)
+
+# Answer columns copied into the archive, and where each one lands there
+ANSWER_COLUMNS = ('id', 'student_id', 'question_id', 'selected_option', 'file_path', 'is_correct', 'is_expired',
+                  'submitted_at')
+ARCHIVE_COLUMNS = ('answer_id',) + ANSWER_COLUMNS[1:]
+
+def answer_history():
+    # Live and archived answers as one subquery, for aggregates that must count both
+    live = db.select(*[getattr(Answer, name) for name in ANSWER_COLUMNS])
+    archived = db.select(*[getattr(AnswerArchive, name) for name in ARCHIVE_COLUMNS])
+    return live.union_all(archived).subquery('answer_history')
 
 class Attempt(db.Model):
     __tablename__ = 'attempts'
@@ -56,6 +91,52 @@ class Attempt(db.Model):
     start_time = db.Column(db.DateTime, default=datetime.utcnow)
     __table_args__ = (db.UniqueConstraint('student_id', 'question_id', name='_student_question_uc'),)
 
+class StudentStats(db.Model):
+    # Running per-student totals, maintained by submit_answer (see student_stats.py)
+    __tablename__ = 'student_stats'
+    student_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    solved = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
+    today_date = db.Column(db.Date)
+    today_solved = db.Column(db.Integer, nullable=False, default=0)
+
+class TopicStats(db.Model):
+    # Per-student, per-topic totals for the topic leaderboards (see analytics.py)
+    __tablename__ = 'topic_stats'
+    student_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    topic = db.Column(db.String(100), primary_key=True)
+    solved = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
+    __table_args__ = (db.Index('ix_topic_stats_topic_correct', 'topic', 'correct'),)
+
+class QuestionStats(db.Model):
+    # Per-question answer counts and option distribution (see analytics.py)
+    __tablename__ = 'question_stats'
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), primary_key=True)
+    answers = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
+    option_a = db.Column(db.Integer, nullable=False, default=0)
+    option_b = db.Column(db.Integer, nullable=False, default=0)
+    option_c = db.Column(db.Integer, nullable=False, default=0)
+    option_d = db.Column(db.Integer, nullable=False, default=0)
+    option_other = db.Column(db.Integer, nullable=False, default=0)
+
+class QuestionTimeBucket(db.Model):
+    # Histogram of seconds from attempt start to submission, per question
+    __tablename__ = 'question_time_buckets'
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class StoredFile(db.Model):
+    # Reference counts for content-addressed uploads (see file_store.py)
+    __tablename__ = 'stored_files'
+    store = db.Column(db.String(20), primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    size = db.Column(db.Integer)
+    refcount = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class Classroom(db.Model):
     __tablename__ = 'classroom'
     id = db.Column(db.Integer, primary_key=True)
@@ -83,3 +164,4 @@ class Notification(db.Model):
     is_correct = db.Column(db.Boolean)
     read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (db.Index('ix_notifications_read_created_at', 'read', 'created_at'),)
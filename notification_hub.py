@@ -0,0 +1,48 @@
+import json
+import queue
+import threading
+
+
+class NotificationHub:
+    """In-process publish/subscribe fan-out for admin notification streams."""
+
+    def __init__(self, max_subscribers=4, backlog=100):
+        self.max_subscribers = max_subscribers
+        self.backlog = backlog
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        # Every open stream pins a server thread, so refuse once the cap is reached
+        # and let the client fall back to polling.
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscription = queue.Queue(maxsize=self.backlog)
+            self._subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event, data=None):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.put_nowait((event, data))
+            except queue.Full:
+                # Slow consumer: drop its backlog and ask it to resync from the DB
+                with subscription.mutex:
+                    subscription.queue.clear()
+                subscription.put_nowait(('resync', None))
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+def format_sse(event, data=None):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,90 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from werkzeug.security import generate_password_hash, check_password_hash
+
+_method_prefixes = {}
+# Never fork hashing processes from a process that already runs threads (log listener,
+# batch writer, maintenance): a child could inherit a lock some thread was holding
+_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def _method_prefix(method):
+    # werkzeug expands e.g. 'scrypt' to 'scrypt:32768:8:1'; learn the expansion once per process
+    if method not in _method_prefixes:
+        _method_prefixes[method] = generate_password_hash('', method=method).split('$', 1)[0]
+    return _method_prefixes[method]
+
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify(stored, password, method):
+    """(matches, replacement hash if the stored one uses an outdated method/cost)."""
+    if not check_password_hash(stored, password):
+        return False, None
+    if stored.split('$', 1)[0] != _method_prefix(method):
+        return True, generate_password_hash(password, method=method)
+    return True, None
+
+
+class HasherBusy(Exception):
+    """Too many hashes queued; the caller should answer 503 with Retry-After."""
+
+
+class PasswordHasher:
+    """Runs password hashing in a small process pool so it never holds the GIL
+    on request threads. At most max_pending hashes may be queued or running;
+    beyond that (or after timeout seconds) HasherBusy is raised immediately.
+    With workers=0 hashing runs inline, still bounded by max_pending.
+    """
+
+    def __init__(self, method='scrypt', workers=2, max_pending=16, timeout=10):
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._pid = None
+        self._pool_lock = threading.Lock()
+
+    def _executor(self):
+        # Created on first use (and again after a fork) so each server worker owns its pool
+        if self._pool is None or self._pid != os.getpid():
+            with self._pool_lock:
+                if self._pool is None or self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context(_START_METHOD))
+                    atexit.register(self._pool.shutdown, wait=False, cancel_futures=True)
+        return self._pool
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        if not self.workers:
+            try:
+                return fn(*args)
+            finally:
+                self._slots.release()
+        try:
+            future = self._executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot stays taken until the hash actually finishes, even if we stop waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HasherBusy()
+
+    def hash(self, password):
+        return self._run(_hash, password, self.method)
+
+    def verify(self, stored, password):
+        """Returns (matches, new_hash); new_hash is set when the stored hash should be replaced."""
+        return self._run(_verify, stored, password, self.method)
@@ -0,0 +1,80 @@
+import logging
+import threading
+from collections import namedtuple
+from flask import g, has_app_context
+from models import db, Question
+
+QUESTION_FIELDS = ('id', 'text', 'topic', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_answer',
+                   'explanation', 'meet_link', 'time_limit', 'image_file', 'created_at')
+
+# Immutable, session-free copy of a Question row; templates read it like the ORM object
+QuestionSnapshot = namedtuple('QuestionSnapshot', QUESTION_FIELDS)
+
+
+def _snapshot_size(q):
+    return sum(len(value) for value in q if isinstance(value, str))
+
+
+class QuestionCache:
+    """Read-through cache of the whole question bank, keyed by a version counter.
+
+    Writers call invalidate() after committing; readers always see either the
+    current version or a fresh load. A bank larger than max_bytes is not pinned
+    in memory: it is loaded once per request (memoized on flask.g) and a
+    warning is logged once per version.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._version = 0
+        self._entry = None  # (version, questions, by_id)
+        self._lock = threading.Lock()
+        self._warned_version = None
+        self._g_key = f'question_cache_{id(self)}'
+
+    @property
+    def version(self):
+        return self._version
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._entry = None
+
+    def _load(self):
+        columns = [getattr(Question, name) for name in QUESTION_FIELDS]
+        rows = db.session.query(*columns).order_by(Question.created_at.desc(), Question.id.desc()).all()
+        return tuple(QuestionSnapshot(*row) for row in rows)
+
+    def _current(self):
+        entry = self._entry
+        if entry is not None and entry[0] == self._version:
+            return entry
+        if has_app_context():
+            entry = g.get(self._g_key)
+            if entry is not None and entry[0] == self._version:
+                return entry
+        with self._lock:
+            entry = self._entry
+            if entry is not None and entry[0] == self._version:
+                return entry
+            version = self._version
+            questions = self._load()
+            entry = (version, questions, {q.id: q for q in questions})
+            size = sum(_snapshot_size(q) for q in questions)
+            if size <= self.max_bytes:
+                self._entry = entry
+            elif self._warned_version != version:
+                self._warned_version = version
+                logging.warning(f"Question bank ({size} bytes) exceeds QUESTION_CACHE_MAX_BYTES "
+                                f"({self.max_bytes}); loading it once per request")
+        if self._entry is not entry and has_app_context():
+            setattr(g, self._g_key, entry)
+        return entry
+
+    def all(self):
+        """All questions, newest first."""
+        return self._current()[1]
+
+    def get(self, question_id):
+        return self._current()[2].get(question_id)
@@ -0,0 +1,188 @@
+import codecs
+import csv
+import hashlib
+import json
+from sqlalchemy import insert
+from models import db, Question
+
+FORMATS = ('csv', 'json', 'jsonl')
+OPTION_FIELDS = ('option_a', 'option_b', 'option_c', 'option_d')
+MAX_LENGTHS = {'topic': 100, 'option_a': 255, 'option_b': 255, 'option_c': 255, 'option_d': 255}
+
+
+def detect_format(filename, default='csv'):
+    ext = filename.rsplit('.', 1)[-1].lower() if filename and '.' in filename else ''
+    if ext == 'ndjson':
+        return 'jsonl'
+    return ext if ext in FORMATS else default
+
+
+def _iter_json_array(text_stream, chunk_size=64 * 1024):
+    # Incremental parse of a top-level JSON array so large files are never held whole
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    eof = False
+    while True:
+        buffer = buffer.lstrip(' \t\r\n,')
+        if not started and buffer:
+            if buffer[0] != '[':
+                raise ValueError('JSON input must be an array of question objects')
+            buffer = buffer[1:]
+            started = True
+            continue
+        if started and buffer.startswith(']'):
+            return
+        if buffer:
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except ValueError:
+                if eof:
+                    raise ValueError('Truncated or malformed JSON input')
+            else:
+                yield item
+                buffer = buffer[end:]
+                continue
+        if eof:
+            if started:
+                raise ValueError('Truncated or malformed JSON input')
+            return
+        chunk = text_stream.read(chunk_size)
+        if chunk:
+            buffer += chunk
+        else:
+            eof = True
+
+
+def iter_records(binary_stream, fmt):
+    """Yield (row_number, record) pairs; a record is a dict, or an exception for unparseable rows."""
+    text_stream = codecs.getreader('utf-8-sig')(binary_stream)
+    if fmt == 'csv':
+        for number, record in enumerate(csv.DictReader(text_stream), 1):
+            yield number, record
+    elif fmt == 'jsonl':
+        number = 0
+        for line in text_stream:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                yield number, json.loads(line)
+            except ValueError as e:
+                yield number, e
+    elif fmt == 'json':
+        for number, record in enumerate(_iter_json_array(text_stream), 1):
+            yield number, record
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def content_key(values):
+    digest = hashlib.sha256()
+    for field in ('text', 'topic') + OPTION_FIELDS + ('correct_answer',):
+        digest.update((values.get(field) or '').strip().lower().encode())
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+TEXT_FIELDS = ('text', 'topic', 'explanation') + OPTION_FIELDS + ('correct_answer',)
+
+
+def validate_record(record):
+    """Return (values, errors) for one input record."""
+    if not isinstance(record, dict):
+        return None, ['Row is not an object']
+    clean = {k.strip().lower(): (v.strip() if isinstance(v, str) else v) for k, v in record.items() if k}
+    errors = []
+    # JSON numbers are read as text, like the same CSV cell would be; objects, lists and booleans are rejected
+    for field in TEXT_FIELDS:
+        value = clean.get(field)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            clean[field] = str(value)
+        elif value is not None and not isinstance(value, str):
+            errors.append(f'{field} must be text')
+            clean[field] = None
+    values = {
+        'text': clean.get('text') or '',
+        'topic': clean.get('topic') or 'General',
+        'explanation': clean.get('explanation') or None,
+    }
+    if not values['text']:
+        errors.append('text is required')
+    for field in OPTION_FIELDS:
+        values[field] = str(clean.get(field) or '')
+        if not values[field]:
+            errors.append(f'{field} is required')
+    correct = str(clean.get('correct_answer') or '').upper()
+    if correct not in ('A', 'B', 'C', 'D'):
+        errors.append('correct_answer must be one of A, B, C, D')
+    values['correct_answer'] = correct
+    time_limit = clean.get('time_limit')
+    if time_limit in (None, ''):
+        values['time_limit'] = 10
+    else:
+        try:
+            values['time_limit'] = int(time_limit)
+            if values['time_limit'] < 0:
+                raise ValueError
+        except (TypeError, ValueError):
+            errors.append('time_limit must be a non-negative integer')
+    for field, limit in MAX_LENGTHS.items():
+        if values.get(field) and len(values[field]) > limit:
+            errors.append(f'{field} is longer than {limit} characters')
+    key = clean.get('import_key') or clean.get('key')
+    values['import_key'] = str(key)[:64] if key else content_key(values)
+    return values, errors
+
+
+def _existing_keys(keys):
+    if not keys:
+        return set()
+    rows = db.session.query(Question.import_key).filter(Question.import_key.in_(keys))
+    return {key for (key,) in rows}
+
+
+def import_questions(binary_stream, fmt, dry_run=False, batch_size=500):
+    """Validate and insert questions in batches, one short transaction per batch.
+
+    Rows whose import key already exists (in the database or earlier in the
+    file) are skipped, so re-running the same import is a no-op.
+    """
+    report = {'format': fmt, 'dry_run': dry_run, 'total': 0, 'valid': 0, 'inserted': 0, 'duplicates': 0, 'errors': []}
+    seen = set()
+    batch = []
+
+    def flush():
+        fresh = _existing_keys([values['import_key'] for values in batch])
+        rows = [values for values in batch if values['import_key'] not in fresh]
+        report['duplicates'] += len(batch) - len(rows)
+        report['valid'] += len(rows)
+        if rows and not dry_run:
+            db.session.execute(insert(Question), rows)
+            db.session.commit()
+            report['inserted'] += len(rows)
+        batch.clear()
+
+    try:
+        for number, record in iter_records(binary_stream, fmt):
+            report['total'] += 1
+            if isinstance(record, Exception):
+                report['errors'].append({'row': number, 'errors': [f'Invalid JSON: {record}']})
+                continue
+            values, errors = validate_record(record)
+            if errors:
+                report['errors'].append({'row': number, 'errors': errors})
+                continue
+            if values['import_key'] in seen:
+                report['duplicates'] += 1
+                continue
+            seen.add(values['import_key'])
+            batch.append(values)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        db.session.rollback()
+        report['errors'].append({'row': None, 'errors': [str(e)]})
+    return report
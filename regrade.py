@@ -0,0 +1,73 @@
+from sqlalchemy import and_, case, func
+from analytics import rebuild_question_stats, rebuild_topic_stats
+from models import db, Answer, AnswerArchive, Notification, Question
+from student_stats import rebuild_student_stats
+
+
+def _graded(model):
+    # Same rule submit_answer grades with: the selected option equals the question's key
+    return case((and_(model.selected_option.is_not(None), model.selected_option == Question.correct_answer), True),
+                else_=False)
+
+
+def _scope(model, question_ids=None, topic=None):
+    criteria = [model.question_id == Question.id, model.is_correct.is_distinct_from(_graded(model))]
+    if question_ids is not None:
+        criteria.append(Question.id.in_(list(question_ids)))
+    if topic is not None:
+        criteria.append(Question.topic == topic)
+    return criteria
+
+
+def regrade(question_ids=None, topic=None, dry_run=False):
+    """Re-apply the current answer keys to stored answers with set-based statements.
+
+    Covers live and archived answers, limited to question_ids and/or topic when
+    given, the whole bank otherwise. Returns a report of the answers whose grade
+    changes, per question. Unless dry_run, the answers, their admin notifications
+    and the student, topic and question statistics are updated in the caller's
+    transaction; the caller commits.
+    """
+    by_question, student_ids = {}, set()
+    for model in (Answer, AnswerArchive):
+        criteria = _scope(model, question_ids, topic)
+        rows = db.session.query(
+            model.question_id,
+            func.sum(case((_graded(model), 1), else_=0)),
+            func.count(model.id),
+        ).filter(*criteria).group_by(model.question_id).all()
+        for question_id, to_correct, changed in rows:
+            q = by_question.setdefault(question_id, {'question_id': question_id, 'to_correct': 0, 'to_incorrect': 0})
+            q['to_correct'] += to_correct
+            q['to_incorrect'] += changed - to_correct
+        student_ids.update(student_id for (student_id,) in
+                           db.session.query(model.student_id).filter(*criteria).distinct())
+    by_question = [by_question[question_id] for question_id in sorted(by_question)]
+    report = {
+        'dry_run': dry_run,
+        'changed': sum(q['to_correct'] + q['to_incorrect'] for q in by_question),
+        'to_correct': sum(q['to_correct'] for q in by_question),
+        'to_incorrect': sum(q['to_incorrect'] for q in by_question),
+        'students': len(student_ids),
+        'questions': by_question,
+    }
+    if dry_run or not by_question:
+        return report
+
+    question_ids = [q['question_id'] for q in by_question]
+    for model in (Answer, AnswerArchive):
+        db.session.execute(db.update(model).values(is_correct=_graded(model))
+                           .where(*_scope(model, question_ids, topic))
+                           .execution_options(synchronize_session=False))
+        # Notifications are written with the answer's submitted_at, which pairs them up
+        db.session.execute(db.update(Notification).values(is_correct=model.is_correct).where(
+            Notification.question_id.in_(question_ids),
+            model.student_id == Notification.student_id,
+            model.question_id == Notification.question_id,
+            model.submitted_at == Notification.created_at,
+            Notification.is_correct.is_distinct_from(model.is_correct),
+        ).execution_options(synchronize_session=False))
+    rebuild_student_stats(student_ids)
+    rebuild_topic_stats(student_ids)
+    rebuild_question_stats(question_ids)
+    return report
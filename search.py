@@ -0,0 +1,126 @@
+import re
+from sqlalchemy import column, func, inspect, literal_column, or_, table, text
+from sqlalchemy.exc import OperationalError
+from models import db, Question
+from question_cache import QUESTION_FIELDS, QuestionSnapshot
+
+# Indexed columns, in FTS column order, with their bm25 weights
+SEARCH_COLUMNS = (('text', 10.0), ('topic', 5.0), ('option_a', 2.0), ('option_b', 2.0), ('option_c', 2.0),
+                  ('option_d', 2.0), ('explanation', 1.0))
+FTS_TABLE = 'questions_fts'
+
+questions_fts = table(FTS_TABLE, column('rowid'), *[column(name) for name, _ in SEARCH_COLUMNS])
+_fts_ready = set()  # engine urls known to have the FTS5 table
+
+
+def fts_enabled():
+    bind = db.session.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return False
+    key = str(bind.url)
+    if key not in _fts_ready and inspect(bind).has_table(FTS_TABLE):
+        _fts_ready.add(key)
+    return key in _fts_ready
+
+
+def _terms(query):
+    return re.findall(r'\w+', query or '')
+
+
+def _match_expression(terms):
+    # Every term must match, each as a quoted prefix so user input can't inject FTS syntax
+    return ' '.join('"%s"*' % term.replace('"', '""') for term in terms)
+
+
+def _like_filters(terms):
+    filters = []
+    for term in terms:
+        pattern = '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        filters.append(or_(*[getattr(Question, name).ilike(pattern, escape='\\') for name, _ in SEARCH_COLUMNS]))
+    return filters
+
+
+def _matching(select, terms):
+    """Restrict a select over questions to the search terms; returns (select, result order)."""
+    if terms and fts_enabled():
+        weights = [weight for _, weight in SEARCH_COLUMNS]
+        return select.join(questions_fts, questions_fts.c.rowid == Question.id) \
+            .where(literal_column(FTS_TABLE).op('MATCH')(_match_expression(terms))), \
+            [func.bm25(literal_column(FTS_TABLE), *weights), Question.id.desc()]
+    if terms:
+        select = select.where(*_like_filters(terms))
+    return select, [Question.created_at.desc(), Question.id.desc()]
+
+
+def question_facets(query=''):
+    """[{topic, count}] for the questions matching query (every question when empty), largest first."""
+    select, _ = _matching(db.select(Question.topic, func.count()), _terms(query))
+    rows = db.session.execute(select.group_by(Question.topic).order_by(func.count().desc())).all()
+    return [{'topic': name, 'count': count} for name, count in rows if name]
+
+
+def search_questions(query='', topic=None, page=1, per_page=20):
+    """Ranked, paginated question search with per-topic facet counts.
+
+    Uses the SQLite FTS5 index when it exists (bm25 ranking), otherwise
+    LIKE filters ordered newest first. An empty query lists every question.
+    """
+    columns = [getattr(Question, name) for name in QUESTION_FIELDS]
+    base, order = _matching(db.select(*columns), _terms(query))
+    if topic:
+        base = base.where(Question.topic == topic)
+    total = db.session.execute(base.with_only_columns(func.count(), maintain_column_froms=True).order_by(None)).scalar()
+    page = max(page, 1)
+    rows = db.session.execute(base.order_by(*order).limit(per_page).offset((page - 1) * per_page)).all()
+    return {
+        'questions': [QuestionSnapshot(*row) for row in rows],
+        'total': total,
+        'page': page,
+        'pages': max(1, -(-total // per_page)),
+        'facets': question_facets(query),
+    }
+
+
+# --- Index maintenance (no-ops without the FTS table) ---
+def _insert_from_questions(where):
+    names = [name for name, _ in SEARCH_COLUMNS]
+    select = db.select(Question.id, *[func.coalesce(getattr(Question, name), '') for name in names]).where(where)
+    return questions_fts.insert().from_select(['rowid', *names], select)
+
+
+def index_questions(question_ids):
+    """Re-index the given questions; call inside the transaction that wrote them."""
+    question_ids = list(question_ids)
+    if not question_ids or not fts_enabled():
+        return
+    db.session.execute(questions_fts.delete().where(questions_fts.c.rowid.in_(question_ids)))
+    db.session.execute(_insert_from_questions(Question.id.in_(question_ids)))
+
+
+def unindex_question(question_id):
+    if fts_enabled():
+        db.session.execute(questions_fts.delete().where(questions_fts.c.rowid == question_id))
+
+
+def index_missing():
+    """Index questions that were inserted without going through index_questions (e.g. bulk imports)."""
+    if fts_enabled():
+        indexed = db.select(questions_fts.c.rowid)
+        return db.session.execute(_insert_from_questions(Question.id.not_in(indexed))).rowcount
+    return 0
+
+
+def rebuild_search_index():
+    """(Re)create the FTS5 table and fill it from questions; returns rows indexed, or None when unsupported."""
+    bind = db.session.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return None
+    names = ', '.join(name for name, _ in SEARCH_COLUMNS)
+    try:
+        db.session.execute(text(f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                                f"USING fts5({names}, tokenize='unicode61 remove_diacritics 2')"))
+    except OperationalError:
+        return None  # SQLite built without FTS5
+    _fts_ready.add(str(bind.url))
+    db.session.execute(questions_fts.delete())
+    return db.session.execute(_insert_from_questions(Question.id.is_not(None))).rowcount
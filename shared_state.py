@@ -0,0 +1,122 @@
+import os
+import secrets
+import tempfile
+import threading
+
+
+def load_or_create_secret(path, nbytes=32):
+    """Read the app secret from path, creating it on first boot.
+
+    The file is written to a temporary name and hard-linked into place, so
+    concurrently starting workers all end up with the same complete secret.
+    """
+    try:
+        with open(path) as f:
+            secret = f.read().strip()
+        if secret:
+            return secret
+    except FileNotFoundError:
+        pass
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.secret-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(secrets.token_hex(nbytes))
+        os.chmod(tmp, 0o600)
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            pass  # another worker won the race; use its secret
+    finally:
+        os.unlink(tmp)
+    with open(path) as f:
+        return f.read().strip()
+
+
+class SharedVersions:
+    """Cross-process change counters backed by files in a local directory.
+
+    bump(name) appends a byte to <directory>/<name>.version, so its (inode, size)
+    stamp changes on every bump; each process compares the stamp with the last
+    one it saw and sync() runs the callbacks registered for names that changed.
+    One stat() per name per sync, no broker. bump_soon(name, delay) coalesces
+    frequent bumps into one append per delay, made from a timer thread.
+    """
+
+    max_size = 64 * 1024
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._callbacks = {}
+        self._seen = {}
+        self._own = {}
+        self._pending = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def _path(self, name):
+        return os.path.join(self.directory, f'{name}.version')
+
+    def stamp(self, name):
+        try:
+            st = os.stat(self._path(name))
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size)
+
+    def register(self, name, callback):
+        with self._lock:
+            self._callbacks[name] = callback
+            self._seen[name] = self.stamp(name)
+
+    def bump(self, name):
+        path = self._path(name)
+        with open(path, 'a') as f:
+            f.write('.')
+            size = f.tell()
+            inode = os.fstat(f.fileno()).st_ino
+        if size >= self.max_size:
+            # Start over with a fresh file; it gets a different inode than the one being replaced
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=f'.{name}-')
+            with os.fdopen(fd, 'w') as f:
+                f.write('.')
+            os.replace(tmp, path)
+            self._own.pop(name, None)
+        else:
+            # Stamp just before and just after this process's byte; size 1 means the append created the file
+            self._own[name] = ((inode, size - 1) if size > 1 else None, (inode, size))
+
+    def bump_soon(self, name, delay):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Timers don't survive a fork; forget the parent's
+                self._pid, self._pending = os.getpid(), {}
+            if name in self._pending:
+                return
+            timer = threading.Timer(delay, self._bump_pending, (name,))
+            timer.daemon = True
+            self._pending[name] = timer
+        timer.start()
+
+    def _bump_pending(self, name):
+        with self._lock:
+            self._pending.pop(name, None)
+        self.bump(name)
+
+    def changed_elsewhere(self, name, seen, stamp):
+        """Whether the move from seen to stamp includes a bump by another process,
+        rather than only this process's own last bump."""
+        return stamp != seen and self._own.get(name) != (seen, stamp)
+
+    def sync(self):
+        changed = []
+        with self._lock:
+            for name in self._callbacks:
+                stamp = self.stamp(name)
+                if stamp != self._seen[name]:
+                    self._seen[name] = stamp
+                    changed.append(self._callbacks[name])
+        for callback in changed:
+            callback()
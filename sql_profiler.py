@@ -0,0 +1,118 @@
+import re
+import threading
+import time
+from collections import Counter, deque
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_IN_LIST = re.compile(r'\((\s*\?\s*,)+\s*\?\s*\)|\((\s*%\(\w+\)s\s*,)+\s*%\(\w+\)s\s*\)')
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_SPACE = re.compile(r'\s+')
+
+
+def statement_shape(statement):
+    """Collapse literals, IN-lists and whitespace so repeated queries compare equal."""
+    shape = _IN_LIST.sub('(?)', statement)
+    shape = _LITERALS.sub('?', shape)
+    return _SPACE.sub(' ', shape).strip()
+
+
+class RequestProfile:
+    __slots__ = ('count', 'total', 'shapes', 'slowest')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.shapes = Counter()
+        self.slowest = []
+
+    def record(self, statement, seconds, keep):
+        self.count += 1
+        self.total += seconds
+        self.shapes[statement_shape(statement)] += 1
+        self.slowest.append((seconds, statement))
+        if len(self.slowest) > keep * 4:
+            self.slowest.sort(reverse=True)
+            del self.slowest[keep:]
+
+
+class SQLProfiler:
+    """Per-request SQL statistics collected from SQLAlchemy cursor events.
+
+    Nothing is registered unless SQL_PROFILER is enabled, so a disabled
+    profiler costs nothing on the query path.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.recent = deque()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SQL_PROFILER', False)
+        app.config.setdefault('SQL_PROFILER_HISTORY', 200)
+        app.config.setdefault('SQL_PROFILER_SLOWEST', 5)
+        app.config.setdefault('SQL_PROFILER_N_PLUS_ONE', 5)
+        self.enabled = bool(app.config['SQL_PROFILER'])
+        if not self.enabled:
+            return
+        self.keep = app.config['SQL_PROFILER_SLOWEST']
+        self.threshold = app.config['SQL_PROFILER_N_PLUS_ONE']
+        self.recent = deque(maxlen=app.config['SQL_PROFILER_HISTORY'])
+        event.listen(Engine, 'before_cursor_execute', self._before)
+        event.listen(Engine, 'after_cursor_execute', self._after)
+        app.after_request(self._finish)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('sql_profiler_start', []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('sql_profiler_start')
+        if not starts:
+            return
+        started = starts.pop()
+        if not has_request_context():
+            return
+        profile = g.get('sql_profile')
+        if profile is None:
+            profile = g.sql_profile = RequestProfile()
+        profile.record(statement, time.perf_counter() - started, self.keep)
+
+    def _finish(self, response):
+        profile = g.pop('sql_profile', None)
+        if profile is None:
+            return response
+        repeated = [(shape, n) for shape, n in profile.shapes.most_common() if n >= self.threshold]
+        response.headers['X-SQL-Profile'] = (f"queries={profile.count}; time={profile.total * 1000:.1f}ms; "
+                                             f"n_plus_one={len(repeated)}")
+        profile.slowest.sort(reverse=True)
+        with self._lock:
+            self.recent.append({
+                'at': time.time(),
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint or 'unmatched',
+                'status': response.status_code,
+                'queries': profile.count,
+                'sql_ms': profile.total * 1000,
+                'n_plus_one': repeated,
+                'slowest': [(seconds * 1000, statement) for seconds, statement in profile.slowest[:self.keep]],
+            })
+        return response
+
+    def report(self):
+        with self._lock:
+            recent = list(self.recent)
+        by_endpoint = {}
+        for entry in recent:
+            agg = by_endpoint.setdefault(entry['endpoint'], {'endpoint': entry['endpoint'], 'requests': 0,
+                                                             'queries': 0, 'sql_ms': 0.0, 'flagged': 0})
+            agg['requests'] += 1
+            agg['queries'] += entry['queries']
+            agg['sql_ms'] += entry['sql_ms']
+            agg['flagged'] += 1 if entry['n_plus_one'] else 0
+        endpoints = sorted(by_endpoint.values(), key=lambda a: a['sql_ms'], reverse=True)
+        return {'recent': list(reversed(recent)), 'endpoints': endpoints}
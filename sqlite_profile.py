@@ -0,0 +1,55 @@
+import sqlite3
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULTS = {
+    'SQLITE_PERFORMANCE_PROFILE': True,
+    'SQLITE_JOURNAL_MODE': 'WAL',
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_BUSY_TIMEOUT_MS': 5000,
+    'SQLITE_CACHE_SIZE_KB': 20000,
+    'SQLITE_MMAP_SIZE': 256 * 1024 * 1024,
+}
+
+
+def _env_value(raw, default):
+    if isinstance(default, bool):
+        return raw.lower() not in ('0', 'false', 'no', 'off')
+    if isinstance(default, int):
+        return int(raw)
+    return raw.upper()
+
+
+def load_config(app, environ):
+    for key, default in DEFAULTS.items():
+        app.config.setdefault(key, _env_value(environ[key], default) if key in environ else default)
+
+
+def pragma_statements(config):
+    return [
+        f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        # A negative cache_size is interpreted by SQLite as KiB rather than pages
+        f"PRAGMA cache_size=-{int(config['SQLITE_CACHE_SIZE_KB'])}",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def init_app(app):
+    """Apply the SQLite performance pragmas to every new pooled connection."""
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        return
+    if not app.config['SQLITE_PERFORMANCE_PROFILE']:
+        return
+    statements = pragma_statements(app.config)
+
+    @event.listens_for(Engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
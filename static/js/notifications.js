@@ -0,0 +1,117 @@
+const bell = document.getElementById('notif-bell');
+const dropdown = document.getElementById('notif-dropdown');
+const list = document.getElementById('notif-list');
+const badge = document.getElementById('notif-count');
+let lastNotifCount = 0;
+let isFirstLoad = true;
+
+// Request notification permission
+if ("Notification" in window && Notification.permission === "default") {
+    Notification.requestPermission();
+}
+
+bell.onclick = (e) => {
+    e.stopPropagation();
+    dropdown.style.display = dropdown.style.display === 'block' ? 'none' : 'block';
+};
+
+window.onclick = () => { dropdown.style.display = 'none'; };
+dropdown.onclick = (e) => e.stopPropagation();
+
+let notifState = { count: 0, notifications: [] };
+let pollTimer = null;
+
+function renderNotifications(data) {
+    notifState = data;
+    if (data.count > 0) {
+        badge.innerText = data.count;
+        badge.style.display = 'flex';
+
+        let html = '';
+        data.notifications.forEach(n => {
+            html += `
+                <div class="notification-item">
+                    <div style="display: flex; justify-content: space-between; align-items: start;">
+                        <strong style="color: var(--text-main); font-size: 0.85rem;">${n.student_name}</strong>
+                        <span style="font-size: 0.7rem; color: var(--text-dim);">${n.created_at}</span>
+                    </div>
+                    <div style="font-size: 0.8rem; color: var(--text-dim); line-height: 1.4;">
+                        Finished: <span style="color: var(--primary);">${n.question_text}</span>
+                    </div>
+                    <div style="font-size: 0.75rem; font-weight: 700; color: ${n.is_correct ? 'var(--accent)' : 'var(--danger)'}">
+                        ${n.is_correct ? 'CORRECT ✓' : 'INCORRECT ✗'}
+                    </div>
+                </div>
+            `;
+        });
+        list.innerHTML = html;
+    } else {
+        badge.style.display = 'none';
+        list.innerHTML = '<div class="notification-empty">No new submissions</div>';
+    }
+}
+
+function showDesktopAlert(body) {
+    if ("Notification" in window && Notification.permission === "granted") {
+        new Notification("New Submission - AptitudePro", { body: body, icon: "/static/favicon.ico" });
+    }
+}
+
+async function updateNotifications() {
+    try {
+        const res = await fetch('/admin/notifications');
+        const data = await res.json();
+
+        // Show desktop alert if count increased and not first load
+        if (!isFirstLoad && data.count > lastNotifCount && data.count > 0) {
+            const newCount = data.count - lastNotifCount;
+            const latest = data.notifications[0];
+            showDesktopAlert(`${latest.student_name} and ${newCount - 1} others finished questions.`);
+        }
+        lastNotifCount = data.count;
+        isFirstLoad = false;
+        renderNotifications(data);
+    } catch (err) {
+        console.error('Failed to fetch notifications', err);
+    }
+}
+
+function startPolling() {
+    if (pollTimer) return;
+    updateNotifications();
+    pollTimer = setInterval(updateNotifications, 10000); // Every 10 seconds
+}
+
+function connectNotificationStream() {
+    if (!window.EventSource) return startPolling();
+    const stream = new EventSource('/admin/notifications/stream');
+    stream.addEventListener('snapshot', e => renderNotifications(JSON.parse(e.data)));
+    stream.addEventListener('resync', () => updateNotifications());
+    stream.addEventListener('cleared', () => renderNotifications({ count: 0, notifications: [] }));
+    stream.addEventListener('notification', e => {
+        const n = JSON.parse(e.data);
+        renderNotifications({
+            count: notifState.count + 1,
+            notifications: [n].concat(notifState.notifications).slice(0, 20)
+        });
+        showDesktopAlert(`${n.student_name} finished a question.`);
+    });
+    // The browser reconnects on its own after a normal close; a CLOSED state
+    // means the stream was refused (e.g. capacity reached), so poll instead.
+    stream.onerror = () => {
+        if (stream.readyState === EventSource.CLOSED) startPolling();
+    };
+}
+
+async function markAllRead() {
+    try {
+        await fetch('/admin/notifications/mark_read', { method: 'POST' });
+        renderNotifications({ count: 0, notifications: [] });
+        lastNotifCount = 0;
+        dropdown.style.display = 'none';
+    } catch (err) {
+        console.error('Failed to mark as read', err);
+    }
+}
+
+connectNotificationStream();
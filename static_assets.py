@@ -0,0 +1,112 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are built without it
+    brotli = None
+
+COMPRESSIBLE = {'.css', '.js', '.svg', '.html', '.json', '.txt', '.map'}
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Upload folders under static/ hold already-compressed, content-addressed files
+SKIP_DIRS = {'question_images'}
+
+
+class AssetManifest:
+    """Content fingerprints for files under the static folder, recomputed when a file changes."""
+
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def version(self, filename):
+        path = os.path.join(self.static_folder, filename)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = self._versions.get(filename)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(64 * 1024), b''):
+                digest.update(chunk)
+        version = digest.hexdigest()[:12]
+        with self._lock:
+            self._versions[filename] = (stamp, version)
+        return version
+
+
+def _accepted_encodings():
+    header = request.headers.get('Accept-Encoding', '')
+    accepted = set()
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def init_app(app):
+    """Fingerprint url_for('static', ...) URLs and serve them immutable, precompressed when possible."""
+    manifest = AssetManifest(app.static_folder)
+
+    @app.url_defaults
+    def add_static_fingerprint(endpoint, values):
+        if endpoint == 'static' and 'filename' in values and 'v' not in values:
+            version = manifest.version(values['filename'])
+            if version:
+                values['v'] = version
+
+    def serve_static(filename):
+        source = os.path.join(app.static_folder, filename)
+        accepted = _accepted_encodings()
+        response = None
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            variant = source + suffix
+            if encoding in accepted and os.path.isfile(variant) and os.path.isfile(source) \
+                    and os.path.getmtime(variant) >= os.path.getmtime(source):
+                mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                response = send_from_directory(app.static_folder, filename + suffix, mimetype=mimetype)
+                response.headers['Content-Encoding'] = encoding
+                break
+        if response is None:
+            response = app.send_static_file(filename)
+        response.vary.add('Accept-Encoding')
+        if request.args.get('v'):
+            response.headers['Cache-Control'] = IMMUTABLE
+        return response
+
+    app.view_functions['static'] = serve_static
+    return manifest
+
+
+def build_compressed_assets(static_folder):
+    """Write .gz (and .br when brotli is installed) next to each compressible asset."""
+    written = 0
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith('.')]
+        for name in files:
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE:
+                continue
+            source = os.path.join(root, name)
+            with open(source, 'rb') as f:
+                data = f.read()
+            variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                variants.append(('.br', brotli.compress(data, quality=11)))
+            for suffix, payload in variants:
+                if len(payload) >= len(data):
+                    continue
+                with open(source + suffix, 'wb') as out:
+                    out.write(payload)
+                written += 1
+    return written
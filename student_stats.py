@@ -0,0 +1,76 @@
+from datetime import datetime
+from sqlalchemy import case, func, insert, literal
+from models import db, answer_history, StudentStats
+
+
+def _aggregate_select(today, student_ids=None):
+    start_of_today = datetime.combine(today, datetime.min.time())
+    answers = answer_history()
+    select = db.select(
+        answers.c.student_id,
+        func.count(answers.c.id),
+        func.coalesce(func.sum(case((answers.c.is_correct.is_(True), 1), else_=0)), 0),
+        literal(today),
+        func.coalesce(func.sum(case((answers.c.submitted_at >= start_of_today, 1), else_=0)), 0),
+    ).group_by(answers.c.student_id)
+    if student_ids is not None:
+        select = select.where(answers.c.student_id.in_(student_ids))
+    return select
+
+
+def _insert_from_answers(today, student_ids=None):
+    columns = ['student_id', 'solved', 'correct', 'today_date', 'today_solved']
+    return insert(StudentStats).from_select(columns, _aggregate_select(today, student_ids))
+
+
+def record_answer(student_id, is_correct, submitted_at):
+    """Fold one new answer into the student's totals inside the caller's transaction."""
+    day = submitted_at.date()
+    updated = db.session.execute(
+        db.update(StudentStats)
+        .where(StudentStats.student_id == student_id)
+        .values(
+            solved=StudentStats.solved + 1,
+            correct=StudentStats.correct + (1 if is_correct else 0),
+            today_solved=case((StudentStats.today_date == day, StudentStats.today_solved + 1), else_=1),
+            today_date=day,
+        )
+    ).rowcount
+    if not updated:
+        # First answer since the table was introduced: seed the row from the
+        # answers table, which already contains the flushed new answer.
+        db.session.flush()
+        db.session.execute(_insert_from_answers(day, [student_id]))
+
+
+def student_summary(student_id, today):
+    stats = db.session.get(StudentStats, student_id)
+    if stats is None:
+        db.session.execute(_insert_from_answers(today, [student_id]))
+        stats = db.session.get(StudentStats, student_id)
+        if stats is None:
+            stats = StudentStats(student_id=student_id, solved=0, correct=0, today_date=today, today_solved=0)
+            db.session.add(stats)
+        db.session.commit()
+    solved, correct = stats.solved, stats.correct
+    today_solved = stats.today_solved if stats.today_date == today else 0
+    return {
+        'solved': solved,
+        'correct': correct,
+        'incorrect': solved - correct,
+        'accuracy': (correct / solved * 100) if solved else 0,
+        'today_solved': today_solved,
+    }
+
+
+def rebuild_student_stats(student_ids=None, today=None):
+    """Recompute totals from the live and archived answers; all students when no ids are given."""
+    today = today or datetime.utcnow().date()
+    delete = db.delete(StudentStats)
+    if student_ids is not None:
+        student_ids = list(student_ids)
+        if not student_ids:
+            return 0
+        delete = delete.where(StudentStats.student_id.in_(student_ids))
+    db.session.execute(delete)
+    return db.session.execute(_insert_from_answers(today, student_ids)).rowcount
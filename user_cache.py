@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import OrderedDict
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db, User
+
+USER_FIELDS = ('id', 'username', 'full_name', 'role', 'created_at')
+
+
+class UserSnapshot(UserMixin):
+    """Session-free copy of the User columns current_user needs (no password hash)."""
+
+    __slots__ = USER_FIELDS
+
+    def __init__(self, *values):
+        for name, value in zip(USER_FIELDS, values):
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return f'<UserSnapshot {self.id} {self.username}>'
+
+
+class UserCache:
+    """Bounded TTL cache backing the login manager's user_loader.
+
+    Entries are dropped when a User row is updated or deleted through the ORM
+    (after the transaction commits); the TTL bounds staleness for changes made
+    outside this process.
+    """
+
+    def __init__(self, ttl=60, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # user_id -> (expires_at, snapshot or None)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        columns = [getattr(User, name) for name in USER_FIELDS]
+        row = db.session.query(*columns).filter(User.id == user_id).first()
+        user = UserSnapshot(*row) if row else None
+        with self._lock:
+            self._entries[user_id] = (now + self.ttl, user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def watch(self, on_commit=None):
+        """Invalidate entries for users written in committed ORM transactions.
+
+        on_commit() is called after such a transaction, e.g. to notify other processes.
+        """
+        def mark_dirty(mapper, connection, target):
+            session = Session.object_session(target)
+            if session is not None:
+                session.info.setdefault('dirty_user_ids', set()).add(target.id)
+
+        def flush_dirty(session):
+            user_ids = session.info.pop('dirty_user_ids', ())
+            for user_id in user_ids:
+                self.invalidate(user_id)
+            if user_ids and on_commit is not None:
+                on_commit()
+
+        def discard_dirty(session, previous_transaction):
+            session.info.pop('dirty_user_ids', None)
+
+        event.listen(User, 'after_insert', mark_dirty)
+        event.listen(User, 'after_update', mark_dirty)
+        event.listen(User, 'after_delete', mark_dirty)
+        event.listen(Session, 'after_commit', flush_dirty)
+        event.listen(Session, 'after_soft_rollback', discard_dirty)